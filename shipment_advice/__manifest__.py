@@ -4,7 +4,7 @@
 {
     "name": "Shipment Advice",
     "summary": "Manage your (un)loading process through shipment advices.",
-    "version": "16.0.1.4.1",
+    "version": "16.0.1.5.0",
     "author": "Camptocamp, Odoo Community Association (OCA)",
     "website": "https://github.com/OCA/stock-logistics-transport",
     "category": "Warehouse Management",
@@ -23,6 +23,7 @@
         "data/queue_job_function.xml",
         "views/res_config_settings.xml",
         "views/shipment_advice.xml",
+        "views/shipment_advice_load_event.xml",
         "views/stock_picking.xml",
         "views/stock_package_level.xml",
         "views/stock_move.xml",
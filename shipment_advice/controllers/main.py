@@ -0,0 +1,25 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+from werkzeug.exceptions import NotFound
+
+from odoo import http
+from odoo.http import request
+
+
+class ShipmentAdviceController(http.Controller):
+    @http.route(
+        "/shipment_advice/<int:shipment_id>/scan",
+        type="json",
+        auth="user",
+        methods=["POST"],
+    )
+    def scan(self, shipment_id, barcode, unload=False, **kwargs):
+        """Load (or unload) the package or product scanned at the dock.
+
+        Return the loading progress of the shipment advice.
+        """
+        shipment = request.env["shipment.advice"].browse(shipment_id).exists()
+        if not shipment:
+            raise NotFound()
+        return shipment._scan_barcode(barcode, unload=unload)
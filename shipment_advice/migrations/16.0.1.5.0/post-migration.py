@@ -0,0 +1,41 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import logging
+
+from odoo import SUPERUSER_ID, api
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def migrate(cr, version):
+    """Compute the loading progress of the transfers, done ones included so
+    that they can be sorted and filtered on it, by batches."""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    picking_model = env["stock.picking"]
+    picking_ids = picking_model.search(
+        [("picking_type_code", "in", ("incoming", "outgoing"))], order="id"
+    ).ids
+    _logger.info("Computing loading progress of %s transfers", len(picking_ids))
+    compute_method = picking_model._fields["loaded_progress"].compute
+    fields_to_compute = [
+        field
+        for field in picking_model._fields.values()
+        if field.compute == compute_method
+    ]
+    for batch_number, batch_ids in enumerate(
+        split_every(BATCH_SIZE, picking_ids), start=1
+    ):
+        pickings = picking_model.browse(batch_ids)
+        for field in fields_to_compute:
+            env.add_to_compute(field, pickings)
+        picking_model.flush_model()
+        env.invalidate_all()
+        _logger.info(
+            "Loading progress computed for %s/%s transfers",
+            min(batch_number * BATCH_SIZE, len(picking_ids)),
+            len(picking_ids),
+        )
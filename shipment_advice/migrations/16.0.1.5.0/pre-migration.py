@@ -0,0 +1,33 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import logging
+
+from odoo.tools import sql
+
+_logger = logging.getLogger(__name__)
+
+PROGRESS_COLUMNS = [
+    ("loaded_packages_count", "int4"),
+    ("total_packages_count", "int4"),
+    ("loaded_move_lines_count", "int4"),
+    ("total_move_lines_count", "int4"),
+    ("loaded_packages_progress_f", "numeric"),
+    ("loaded_move_lines_progress_f", "numeric"),
+    ("loaded_progress_f", "numeric"),
+    ("loaded_progress", "varchar"),
+    ("loaded_packages_progress", "varchar"),
+    ("loaded_move_lines_progress", "varchar"),
+    ("loaded_weight", "int4"),
+    ("loaded_weight_progress", "varchar"),
+]
+
+
+def migrate(cr, version):
+    """Create the loading progress columns of the transfers beforehand, so the
+    ORM doesn't compute them for every transfer of the database at once. They
+    are computed by batches in the post-migration."""
+    for column, column_type in PROGRESS_COLUMNS:
+        if not sql.column_exists(cr, "stock_picking", column):
+            _logger.info("Creating column %s into stock_picking", column)
+            sql.create_column(cr, "stock_picking", column, column_type)
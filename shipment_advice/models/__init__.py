@@ -4,4 +4,6 @@ from . import stock_move
 from . import stock_move_line
 from . import stock_package_level
 from . import shipment_advice
+from . import shipment_advice_validation_result
+from . import shipment_advice_load_event
 from . import stock_picking
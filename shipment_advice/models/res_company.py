@@ -1,7 +1,8 @@
 # Copyright 2021 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
-from odoo import fields, models
+from odoo import _, api, fields, models
+from odoo.exceptions import ValidationError
 
 
 class ResCompany(models.Model):
@@ -26,6 +27,67 @@ class ResCompany(models.Model):
     shipment_advice_run_in_queue_job = fields.Boolean(
         string="Run shipment advice in queue job",
         help="To prevent timeouts for large shipments, enable this option to execute "
-        "shipment advice validation through a queued jobs. Each picking will be "
-        "validated in a separate job.",
+        "shipment advice validation through queued jobs. The pickings are "
+        "validated by chunks, each chunk in a separate job.",
     )
+    shipment_advice_validation_chunk_size = fields.Integer(
+        string="Shipment advice: pickings validated per job",
+        default=1,
+        help="When shipment advices are validated through queued jobs, number "
+        "of pickings validated by each job. Each picking is still validated "
+        "in its own savepoint.",
+    )
+    shipment_advice_batch_validation = fields.Boolean(
+        string="Shipment advice: validate pickings in batch",
+        help="Validate the pickings of a shipment advice (or of a job chunk) "
+        "all together, in a single savepoint. If the validation fails, the "
+        "pickings are split in halves and validated again until the failing "
+        "ones are isolated.",
+    )
+    shipment_advice_lock_mode = fields.Selection(
+        string="Shipment advice: transfers locking",
+        selection=[
+            ("wait", "Wait"),
+            ("nowait", "No wait"),
+            ("skip_locked", "Skip locked"),
+        ],
+        default="wait",
+        help="How the transfers of a shipment advice are locked before their "
+        "validation. 'Wait' waits for concurrent transactions to release them. "
+        "'No wait' and 'Skip locked' do not wait: if some transfers are "
+        "locked by another transaction, the validation job is postponed and "
+        "retried later.",
+    )
+    shipment_advice_wizards_in_queue_job = fields.Boolean(
+        string="Shipment advice: plan/load/unload large selections in queue jobs",
+        help="Plan, load and unload the records selected in the wizards through "
+        "queued jobs when they exceed the number of records per job. The "
+        "progress is shown on the shipment advice and a notification is sent "
+        "when the operation is finished.",
+    )
+    shipment_advice_wizard_chunk_size = fields.Integer(
+        string="Shipment advice: records planned/loaded/unloaded per job",
+        default=1000,
+    )
+
+    @api.constrains("shipment_advice_validation_chunk_size")
+    def _check_shipment_advice_validation_chunk_size(self):
+        for company in self:
+            if company.shipment_advice_validation_chunk_size <= 0:
+                raise ValidationError(
+                    _(
+                        "The number of pickings validated per job of the "
+                        "shipment advices must be positive."
+                    )
+                )
+
+    @api.constrains("shipment_advice_wizard_chunk_size")
+    def _check_shipment_advice_wizard_chunk_size(self):
+        for company in self:
+            if company.shipment_advice_wizard_chunk_size <= 0:
+                raise ValidationError(
+                    _(
+                        "The number of records planned, loaded or unloaded per "
+                        "job of the shipment advices must be positive."
+                    )
+                )
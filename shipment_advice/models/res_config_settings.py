@@ -13,3 +13,18 @@ class ResConfigSettings(models.TransientModel):
     shipment_advice_run_in_queue_job = fields.Boolean(
         related="company_id.shipment_advice_run_in_queue_job", readonly=False
     )
+    shipment_advice_validation_chunk_size = fields.Integer(
+        related="company_id.shipment_advice_validation_chunk_size", readonly=False
+    )
+    shipment_advice_batch_validation = fields.Boolean(
+        related="company_id.shipment_advice_batch_validation", readonly=False
+    )
+    shipment_advice_lock_mode = fields.Selection(
+        related="company_id.shipment_advice_lock_mode", readonly=False
+    )
+    shipment_advice_wizards_in_queue_job = fields.Boolean(
+        related="company_id.shipment_advice_wizards_in_queue_job", readonly=False
+    )
+    shipment_advice_wizard_chunk_size = fields.Integer(
+        related="company_id.shipment_advice_wizard_chunk_size", readonly=False
+    )
@@ -1,12 +1,30 @@
 # Copyright 2021 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
+import time
+from collections import defaultdict
+
+from psycopg2 import OperationalError
+from psycopg2.errors import LockNotAvailable, SerializationFailure
+
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.tools import groupby, split_every
+from odoo.tools.lru import LRU
 
 from odoo.addons.queue_job.delay import chain, group
+from odoo.addons.queue_job.exception import RetryableJobError
 from odoo.addons.queue_job.job import identity_exact
 
+# Barcode index of the content to load in shipments, per worker, with
+# barcodes as {barcode: (package_level_ids, move_line_ids)}:
+# {(dbname, generation, shipment_id): (planned shipment id, barcodes)}
+# It can be stale (other workers do not invalidate it): its candidates are
+# checked again on the columns changed by loading and planning.
+SCAN_INDEX = LRU(256)
+# Bumped to invalidate all the indexes of a database: {dbname: generation}
+SCAN_INDEX_GENERATIONS = defaultdict(int)
+
 
 class ShipmentAdvice(models.Model):
     _name = "shipment.advice"
@@ -104,6 +122,17 @@ class ShipmentAdvice(models.Model):
         digits=(16, 2),
         compute="_compute_total_load",
     )
+    total_bulk_load = fields.Float(
+        string="Bulk load (kg)",
+        digits=(16, 2),
+        compute="_compute_total_load",
+        help="Weight of the loaded content which is not in a package.",
+    )
+    total_volume = fields.Float(
+        string="Total volume",
+        digits="Volume",
+        compute="_compute_total_load",
+    )
     planned_move_ids = fields.One2many(
         comodel_name="stock.move",
         inverse_name="shipment_advice_id",
@@ -179,6 +208,31 @@ class ShipmentAdvice(models.Model):
     )
 
     error_message = fields.Text(tracking=True)
+    validation_result_ids = fields.One2many(
+        comodel_name="shipment.advice.validation.result",
+        inverse_name="shipment_advice_id",
+        string="Validation results",
+        readonly=True,
+    )
+    background_operation = fields.Selection(
+        selection=[("plan", "Planning"), ("load", "Loading"), ("unload", "Unloading")],
+        readonly=True,
+        copy=False,
+        help="Operation running in background jobs on the shipment.",
+    )
+    background_record_count = fields.Integer(readonly=True, copy=False)
+    background_done_count = fields.Integer(readonly=True, copy=False)
+    background_error = fields.Text(
+        readonly=True,
+        copy=False,
+        help="Error which stopped the last operation run in background jobs.",
+    )
+    load_event_ids = fields.One2many(
+        comodel_name="shipment.advice.load.event",
+        inverse_name="shipment_advice_id",
+        string="Loading journal",
+        readonly=True,
+    )
 
     _sql_constraints = [
         (
@@ -198,11 +252,92 @@ class ShipmentAdvice(models.Model):
         """
         return True
 
-    @api.depends("loaded_move_line_ids.result_package_id.shipping_weight")
+    @api.depends(
+        "loaded_move_line_ids.result_package_id.shipping_weight",
+        "loaded_move_line_ids.qty_done",
+    )
     def _compute_total_load(self):
+        totals = self._get_load_totals()
         for shipment in self:
-            packages = shipment.loaded_move_line_ids.result_package_id
-            shipment.total_load = sum(packages.mapped("shipping_weight"))
+            shipment.update(totals[shipment._origin.id])
+
+    def _get_load_totals(self):
+        """Return the loaded weights and volume, indexed by shipment id.
+
+        The totals of the whole recordset are aggregated in a single query:
+        - 'total_load': shipping weight of the loaded packages
+        - 'total_bulk_load': weight of the loaded lines without package
+        - 'total_volume': volume of all the loaded lines
+        """
+        totals = defaultdict(
+            lambda: {"total_load": 0.0, "total_bulk_load": 0.0, "total_volume": 0.0}
+        )
+        ids = self._origin.ids
+        if not ids:
+            return totals
+        self.env["stock.move.line"].flush_model(
+            [
+                "shipment_advice_id",
+                "result_package_id",
+                "qty_done",
+                "product_id",
+                "product_uom_id",
+            ]
+        )
+        self.env["stock.quant.package"].flush_model(["shipping_weight"])
+        self.env["product.product"].flush_model(["weight", "volume"])
+        self.env["product.template"].flush_model(["uom_id"])
+        self.env.cr.execute(
+            """
+            SELECT shipment_advice_id,
+                SUM(package_weight),
+                SUM(bulk_weight),
+                SUM(volume)
+            FROM (
+                SELECT DISTINCT ON (sml.shipment_advice_id, sml.result_package_id)
+                    sml.shipment_advice_id,
+                    COALESCE(pkg.shipping_weight, 0) AS package_weight,
+                    0 AS bulk_weight,
+                    0 AS volume
+                FROM stock_move_line sml
+                JOIN stock_quant_package pkg ON pkg.id = sml.result_package_id
+                WHERE sml.shipment_advice_id IN %(ids)s
+                UNION ALL
+                SELECT
+                    line.shipment_advice_id,
+                    0 AS package_weight,
+                    CASE WHEN line.result_package_id IS NULL
+                        THEN line.product_qty * line.weight
+                        ELSE 0
+                    END AS bulk_weight,
+                    line.product_qty * line.volume AS volume
+                FROM (
+                    SELECT
+                        sml.shipment_advice_id,
+                        sml.result_package_id,
+                        sml.qty_done / line_uom.factor * product_uom.factor
+                            AS product_qty,
+                        COALESCE(pp.weight, 0) AS weight,
+                        COALESCE(pp.volume, 0) AS volume
+                    FROM stock_move_line sml
+                    JOIN product_product pp ON pp.id = sml.product_id
+                    JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                    JOIN uom_uom line_uom ON line_uom.id = sml.product_uom_id
+                    JOIN uom_uom product_uom ON product_uom.id = pt.uom_id
+                    WHERE sml.shipment_advice_id IN %(ids)s
+                ) AS line
+            ) AS load
+            GROUP BY shipment_advice_id
+            """,
+            {"ids": tuple(ids)},
+        )
+        for shipment_id, package_weight, bulk_weight, volume in self.env.cr.fetchall():
+            totals[shipment_id].update(
+                total_load=package_weight or 0.0,
+                total_bulk_load=bulk_weight or 0.0,
+                total_volume=volume or 0.0,
+            )
+        return totals
 
     @api.depends("planned_move_ids", "loaded_move_line_ids")
     def _compute_picking_ids(self):
@@ -229,16 +364,83 @@ class ShipmentAdvice(models.Model):
                 package_ids
             )
 
-    @api.depends("planned_picking_ids", "planned_move_ids")
+    @api.depends("planned_picking_ids", "planned_move_ids", "loaded_move_line_ids")
     def _compute_count(self):
+        counts = self._get_content_counts()
         for shipment in self:
-            shipment.planned_pickings_count = len(shipment.planned_picking_ids)
-            shipment.planned_moves_count = len(shipment.planned_move_ids)
-            shipment.loaded_pickings_count = len(shipment.loaded_picking_ids)
-            shipment.loaded_move_lines_without_package_count = len(
-                shipment.loaded_move_line_without_package_ids
+            shipment.update(counts[shipment._origin.id])
+
+    def _get_content_counts(self):
+        """Return the content counters of the shipments, indexed by shipment id.
+
+        Counters are computed for the whole recordset through a fixed number
+        of grouped queries, without loading the content in the cache.
+        """
+        counts = defaultdict(
+            lambda: {
+                "planned_pickings_count": 0,
+                "planned_moves_count": 0,
+                "loaded_pickings_count": 0,
+                "loaded_move_lines_without_package_count": 0,
+                "loaded_packages_count": 0,
+            }
+        )
+        ids = self._origin.ids
+        if not ids:
+            return counts
+        move_model = self.env["stock.move"]
+        move_line_model = self.env["stock.move.line"]
+        for group in move_model.read_group(
+            [("shipment_advice_id", "in", ids)],
+            ["picking_id:count_distinct"],
+            ["shipment_advice_id"],
+            lazy=False,
+        ):
+            shipment_counts = counts[group["shipment_advice_id"][0]]
+            shipment_counts["planned_pickings_count"] = group["picking_id"]
+            shipment_counts["planned_moves_count"] = group["__count"]
+        for group in move_line_model.read_group(
+            [("shipment_advice_id", "in", ids)],
+            ["picking_id:count_distinct"],
+            ["shipment_advice_id"],
+            lazy=False,
+        ):
+            shipment_counts = counts[group["shipment_advice_id"][0]]
+            shipment_counts["loaded_pickings_count"] = group["picking_id"]
+        for group in move_line_model.read_group(
+            [("shipment_advice_id", "in", ids), ("package_level_id", "=", False)],
+            ["shipment_advice_id"],
+            ["shipment_advice_id"],
+            lazy=False,
+        ):
+            shipment_counts = counts[group["shipment_advice_id"][0]]
+            shipment_counts["loaded_move_lines_without_package_count"] = group[
+                "__count"
+            ]
+        # Packages are filtered through '_check_include_package_level' which
+        # can be overridden, so group lines by package level to get them
+        package_level_ids_by_shipment = defaultdict(set)
+        for group in move_line_model.read_group(
+            [("shipment_advice_id", "in", ids), ("package_level_id", "!=", False)],
+            ["shipment_advice_id"],
+            ["shipment_advice_id", "package_level_id"],
+            lazy=False,
+        ):
+            package_level_ids_by_shipment[group["shipment_advice_id"][0]].add(
+                group["package_level_id"][0]
+            )
+        all_package_levels = self.env["stock.package_level"].browse(
+            set().union(*package_level_ids_by_shipment.values())
+        )
+        included_ids = set(
+            all_package_levels.filtered(self._check_include_package_level).ids
+        )
+        for shipment_id, package_level_ids in package_level_ids_by_shipment.items():
+            package_levels = all_package_levels.browse(package_level_ids & included_ids)
+            counts[shipment_id]["loaded_packages_count"] = len(
+                package_levels.package_id
             )
-            shipment.loaded_packages_count = len(shipment.loaded_package_ids)
+        return counts
 
     @api.depends("planned_picking_ids", "loaded_picking_ids")
     def _compute_carrier_ids(self):
@@ -257,14 +459,54 @@ class ShipmentAdvice(models.Model):
         incomig_sequence = self.env.ref(
             "shipment_advice.shipment_advice_incoming_sequence"
         )
+        vals_list_by_sequence = defaultdict(list)
         for vals in vals_list:
             sequence = outgoing_sequence
             if vals["shipment_type"] == "incoming":
                 sequence = incomig_sequence
             if vals.get("name", "/") == "/" and defaults.get("name", "/") == "/":
-                vals["name"] = sequence.next_by_id()
+                vals_list_by_sequence[sequence].append(vals)
+        for sequence, sequence_vals_list in vals_list_by_sequence.items():
+            names = self._next_sequence_names(sequence, len(sequence_vals_list))
+            for vals, name in zip(sequence_vals_list, names):
+                vals["name"] = name
         return super().create(vals_list)
 
+    @api.model
+    def _next_sequence_names(self, sequence, count):
+        """Reserve `count` numbers of the sequence in a single operation.
+
+        'No gap' sequences keep consecutive numbers as the sequence row is
+        locked while the whole range is reserved. Sequences using date ranges
+        are delegated to the standard API.
+        """
+        if count == 1 or sequence.use_date_range:
+            return [sequence.next_by_id() for __ in range(count)]
+        sequence.check_access_rights("read")
+        if sequence.implementation == "standard":
+            self.env.cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ("ir_sequence_%03d" % sequence.id, count),
+            )
+            numbers = [row[0] for row in self.env.cr.fetchall()]
+        else:
+            sequence.flush_recordset(["number_next"])
+            self.env.cr.execute(
+                "SELECT number_next FROM ir_sequence WHERE id = %s FOR UPDATE NOWAIT",
+                (sequence.id,),
+            )
+            number_next = self.env.cr.fetchone()[0]
+            self.env.cr.execute(
+                "UPDATE ir_sequence SET number_next = number_next + %s WHERE id = %s",
+                (sequence.number_increment * count, sequence.id),
+            )
+            sequence.invalidate_recordset(["number_next"])
+            numbers = [
+                number_next + index * sequence.number_increment
+                for index in range(count)
+            ]
+        return [sequence.get_next_char(number) for number in numbers]
+
     def action_confirm(self):
         for shipment in self:
             if shipment.state != "draft":
@@ -301,12 +543,85 @@ class ShipmentAdvice(models.Model):
             shipment.state = "in_progress"
         return True
 
-    def _lock_records(self, records):
-        """Lock records for the current SQL transaction."""
+    def _ensure_in_progress(self):
+        """Set the confirmed shipments in progress, once.
+
+        Several operators can start loading the same shipment at the same
+        time: the shipments being set in progress by a concurrent transaction
+        are left aside instead of waiting for (or failing on) their row lock.
+        The 'FOR NO KEY UPDATE' lock does not conflict with the foreign key
+        checks of the lines being loaded in the shipment.
+        """
+        shipments = self.filtered(lambda s: s.state == "confirmed")
+        if not shipments:
+            return True
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute(
+                    """
+                    SELECT id FROM shipment_advice
+                    WHERE id IN %s AND state = 'confirmed'
+                    ORDER BY id
+                    FOR NO KEY UPDATE SKIP LOCKED
+                    """,
+                    (tuple(shipments.ids),),
+                    log_exceptions=False,
+                )
+                locked_ids = [row[0] for row in self.env.cr.fetchall()]
+        except SerializationFailure:
+            # Already updated by a concurrent transaction
+            return True
+        return shipments.browse(locked_ids).action_in_progress()
+
+    def _lock_records(self, records, lock_mode="wait"):
+        """Lock records for the current SQL transaction.
+
+        Records are locked with a single statement, ordered by id, so that
+        concurrent transactions always acquire their locks in the same order.
+        With the 'nowait' mode, a `LockNotAvailable` error is raised if one of
+        the records is already locked, while with 'skip_locked' the records
+        already locked are left aside.
+
+        Return the locked records.
+        """
         if not records:
+            return records
+        sql = "SELECT id FROM %s WHERE id IN %%s ORDER BY id FOR UPDATE" % (
+            records._table
+        )
+        if lock_mode == "nowait":
+            sql += " NOWAIT"
+        elif lock_mode == "skip_locked":
+            sql += " SKIP LOCKED"
+        with self.env.cr.savepoint(flush=False):
+            self.env.cr.execute(sql, (tuple(records.ids),), log_exceptions=False)
+            locked_ids = [row[0] for row in self.env.cr.fetchall()]
+        return records.browse(locked_ids)
+
+    def _lock_pickings_to_validate(self, pickings):
+        """Lock all the pickings to validate according to the company lock mode.
+
+        If some pickings are locked by another transaction, a retryable error
+        is raised when running in a queue job, so the job is postponed.
+        """
+        self.ensure_one()
+        lock_mode = self.company_id.shipment_advice_lock_mode or "wait"
+        try:
+            locked_pickings = self._lock_records(pickings, lock_mode=lock_mode)
+        except LockNotAvailable:
+            locked_pickings = pickings.browse()
+        not_locked_pickings = pickings - locked_pickings
+        if not not_locked_pickings:
             return
-        sql = "SELECT id FROM %s WHERE ID IN %%s FOR UPDATE" % records._table
-        self.env.cr.execute(sql, (tuple(records.ids),), log_exceptions=False)
+        message = _(
+            "%(sa)s: transfers are being processed by another transaction: "
+            "%(pickings)s",
+            sa=self.name,
+            pickings=", ".join(not_locked_pickings.mapped("name")),
+        )
+        if self.env.context.get("job_uuid"):
+            raise RetryableJobError(message)
+        raise UserError(message)
 
     def action_done(self):
         self._check_action_done_allowed()
@@ -320,8 +635,12 @@ class ShipmentAdvice(models.Model):
             return self.planned_picking_ids
         return self.loaded_picking_ids
 
-    def _action_done(self):
-        # Validate transfers (create backorders for unprocessed lines)
+    def _action_done(self, pickings=None):
+        """Validate transfers (create backorders for unprocessed lines)
+
+        :param pickings: transfers to validate, all the transfers to process
+                         by the shipment advice if not set.
+        """
         self.ensure_one()
         self.write({"state": "in_process", "error_message": False})
 
@@ -329,10 +648,14 @@ class ShipmentAdvice(models.Model):
             backorder_policy = "create_backorder"
         else:
             backorder_policy = self.company_id.shipment_advice_outgoing_backorder_policy
-        pickings = self._get_picking_to_process().filtered(
-            lambda p: p.state not in ("cancel", "done")
+        if pickings is None:
+            pickings = self._get_picking_to_process()
+        pickings = pickings.filtered(lambda p: p.state not in ("cancel", "done"))
+        self._set_validation_results(
+            {picking: {"state": "pending"} for picking in pickings}
         )
         if self.run_in_queue_job:
+            chunk_size = self.company_id.shipment_advice_validation_chunk_size or 1
             chain(
                 group(
                     *[
@@ -341,21 +664,175 @@ class ShipmentAdvice(models.Model):
                             description=_(
                                 "%(sa)s: %(pick)s background validation",
                                 sa=self.name,
-                                pick=picking.name,
+                                pick=", ".join(chunk.mapped("name")),
                             ),
-                        )._validate_picking(picking, backorder_policy)
-                        for picking in pickings
+                        )._validate_picking(chunk, backorder_policy)
+                        for chunk in split_every(
+                            chunk_size, pickings.ids, pickings.browse
+                        )
                     ]
                 ),
                 group(self.delayable(description=self.name)._unplan_undone_moves()),
                 group(self.delayable(description=self.name)._postprocess_action_done()),
             ).delay()
             return
-        for picking in pickings:
-            self._validate_picking(picking, backorder_policy)
+        self._validate_picking(pickings, backorder_policy)
         self._unplan_undone_moves()
         self._postprocess_action_done()
 
+    def _use_background_jobs(self, record_count):
+        """Return `True` if the records have to be processed in queue jobs."""
+        company = self.company_id or self.env.company
+        return (
+            company.shipment_advice_wizards_in_queue_job
+            and record_count > company.shipment_advice_wizard_chunk_size
+        )
+
+    @api.model
+    def _split_by_picking(self, records, chunk_size):
+        """Split the records in chunks, keeping the records of a transfer together."""
+        if records._name == "stock.picking":
+            return list(split_every(chunk_size, records.ids, records.browse))
+        chunks = []
+        chunk_ids = []
+        for __, picking_records in groupby(records, key=lambda r: r.picking_id):
+            chunk_ids.extend(record.id for record in picking_records)
+            if len(chunk_ids) >= chunk_size:
+                chunks.append(records.browse(chunk_ids))
+                chunk_ids = []
+        if chunk_ids:
+            chunks.append(records.browse(chunk_ids))
+        return chunks
+
+    def _run_in_background(self, operation, method_name, records_list):
+        """Process the records in chained jobs calling `method_name` by chunk.
+
+        The progress is reported on the shipment and the user is notified
+        when all the chunks have been processed.
+        """
+        self.ensure_one()
+        self._check_background_operation(operation, records_list)
+        chunk_size = self.company_id.shipment_advice_wizard_chunk_size or 1000
+        chunks = [
+            chunk
+            for records in records_list
+            for chunk in self._split_by_picking(records, chunk_size)
+        ]
+        self.write(
+            {
+                "background_operation": operation,
+                "background_record_count": sum(len(chunk) for chunk in chunks),
+                "background_done_count": 0,
+                "background_error": False,
+            }
+        )
+        description = _(
+            "%(sa)s: %(operation)s in background",
+            sa=self.name,
+            operation=self._get_background_operation_label(operation),
+        )
+        chain(
+            *[
+                getattr(self.delayable(description=description), method_name)(chunk)
+                for chunk in chunks
+            ],
+            self.delayable(description=description)._background_notify(),
+        ).delay()
+
+    def _get_background_operation_label(self, operation):
+        selection = self._fields["background_operation"]._description_selection(
+            self.env
+        )
+        return dict(selection)[operation]
+
+    def _check_background_operation(self, operation, records_list):
+        """Check the whole selection before splitting it in jobs.
+
+        Chunks already processed are committed, so the errors which can be
+        detected upfront must not be left to a job in the middle of the chain.
+        """
+        if operation != "load":
+            return
+        move_lines = self.env["stock.move.line"].union(
+            *[
+                records if records._name == "stock.move.line" else records.move_line_ids
+                for records in records_list
+            ]
+        )
+        move_lines._check_load_in_shipment(self)
+
+    def _background_plan(self, records):
+        self._background_process(records, lambda: records._plan_in_shipment(self))
+
+    def _background_load(self, records):
+        self._background_process(records, lambda: records._load_in_shipment(self))
+
+    def _background_unload(self, records):
+        self._background_process(records, records._unload_from_shipment)
+
+    def _background_process(self, records, process):
+        """Process a chunk of the background operation.
+
+        If the chunk fails, the operation is stopped: the remaining chunks
+        are skipped and the user is notified of the error.
+        """
+        if not self.background_operation:
+            # Stopped by the failure of a previous chunk
+            return
+        try:
+            with self.env.cr.savepoint():
+                process()
+        except (RetryableJobError, OperationalError):
+            # Concurrency errors: the job is retried
+            raise
+        except Exception as error:
+            self._background_fail(error)
+            return
+        self._background_progress(len(records))
+
+    def _background_progress(self, record_count):
+        self.background_done_count += record_count
+
+    def _background_fail(self, error):
+        """Stop the background operation and notify the user of the error."""
+        operation = self.background_operation
+        self.write({"background_operation": False, "background_error": str(error)})
+        self.env["bus.bus"]._sendone(
+            self.env.user.partner_id,
+            "simple_notification",
+            {
+                "title": _("Shipment advice %s", self.name),
+                "message": _(
+                    "%(operation)s stopped after %(count)s records: %(error)s",
+                    operation=self._get_background_operation_label(operation),
+                    count=self.background_done_count,
+                    error=error,
+                ),
+                "type": "danger",
+                "sticky": True,
+            },
+        )
+
+    def _background_notify(self):
+        """Notify the user that the background operation is finished."""
+        operation = self.background_operation
+        self.background_operation = False
+        if not operation:
+            return
+        self.env["bus.bus"]._sendone(
+            self.env.user.partner_id,
+            "simple_notification",
+            {
+                "title": _("Shipment advice %s", self.name),
+                "message": _(
+                    "%(operation)s of %(count)s records done.",
+                    operation=self._get_background_operation_label(operation),
+                    count=self.background_done_count,
+                ),
+                "sticky": False,
+            },
+        )
+
     def _check_action_done_allowed(self):
         for shipment in self:
             if shipment.state not in ("in_progress", "error"):
@@ -365,37 +842,178 @@ class ShipmentAdvice(models.Model):
                     )
                 )
 
-    def _validate_picking(self, picking, backorder_policy="create_backorder"):
+    def _validate_picking(self, pickings, backorder_policy="create_backorder"):
+        """Validate the given pickings, each one in its own savepoint.
+
+        The validation results of the pickings are stored all together once
+        they are all processed.
+        """
         self.ensure_one()
-        self._lock_records(picking)
+        self._lock_pickings_to_validate(pickings)
+        results = {}
+        if self.company_id.shipment_advice_batch_validation and len(pickings) > 1:
+            self._validate_pickings_batch(pickings, backorder_policy, results)
+        else:
+            for picking in pickings:
+                start = time.perf_counter()
+                try:
+                    with self.env.cr.savepoint():
+                        if (
+                            picking._check_backorder()
+                            and backorder_policy == "create_backorder"
+                        ):
+                            wiz = self.env["stock.backorder.confirmation"].create({})
+                            wiz.pick_ids = picking
+                            wiz.with_context(
+                                button_validate_picking_ids=picking.ids
+                            ).process()
+                        elif not picking._check_backorder():
+                            picking._action_done()
+                except UserError as error:
+                    self._set_validation_error(
+                        picking, error, time.perf_counter() - start, results
+                    )
+                else:
+                    self._set_validation_success(
+                        picking, time.perf_counter() - start, results
+                    )
+        self._set_validation_results(results)
+
+    def _validate_pickings_batch(self, pickings, backorder_policy, results):
+        """Validate the given pickings all together in a single savepoint.
+
+        If the validation fails, the pickings are split in halves which are
+        validated recursively, until the failing pickings are isolated.
+        """
+        self.ensure_one()
+        start = time.perf_counter()
         try:
             with self.env.cr.savepoint():
-                if (
-                    picking._check_backorder()
-                    and backorder_policy == "create_backorder"
-                ):
+                backorder_pickings = pickings._check_backorder()
+                if backorder_pickings and backorder_policy == "create_backorder":
                     wiz = self.env["stock.backorder.confirmation"].create({})
-                    wiz.pick_ids = picking
-                    wiz.with_context(button_validate_picking_ids=picking.ids).process()
-                elif not picking._check_backorder():
-                    picking._action_done()
+                    wiz.pick_ids = backorder_pickings
+                    wiz.with_context(
+                        button_validate_picking_ids=backorder_pickings.ids
+                    ).process()
+                pickings_to_validate = pickings - backorder_pickings
+                if pickings_to_validate:
+                    pickings_to_validate._action_done()
         except UserError as error:
-            self.write(
-                {
-                    "state": "error",
-                    "error_message": self._get_error_message(error, picking),
-                }
+            if len(pickings) == 1:
+                self._set_validation_error(
+                    pickings, error, time.perf_counter() - start, results
+                )
+                return
+            half = len(pickings) // 2
+            self._validate_pickings_batch(pickings[:half], backorder_policy, results)
+            self._validate_pickings_batch(pickings[half:], backorder_policy, results)
+        else:
+            self._set_validation_success(
+                pickings, (time.perf_counter() - start) / len(pickings), results
             )
 
+    def _set_validation_results(self, results):
+        """Store the validation outcome of the pickings.
+
+        :param results: dict {picking: values of its validation result}
+
+        The previous results of the pickings are replaced by new ones, so
+        that all the results are written with a single insert.
+        """
+        self.ensure_one()
+        if not results:
+            return
+        result_model = self.env["shipment.advice.validation.result"].sudo()
+        picking_ids = [picking.id for picking in results]
+        result_model.search(
+            [("shipment_advice_id", "=", self.id), ("picking_id", "in", picking_ids)]
+        ).unlink()
+        job_uuid = self.env.context.get("job_uuid")
+        result_model.create(
+            [
+                dict(
+                    values,
+                    shipment_advice_id=self.id,
+                    picking_id=picking.id,
+                    job_uuid=job_uuid,
+                )
+                for picking, values in results.items()
+            ]
+        )
+
+    def _set_validation_success(self, pickings, duration, results):
+        for picking in pickings:
+            results[picking] = {
+                "state": "done" if picking.state == "done" else "open",
+                "duration": duration,
+            }
+
+    def _set_validation_error(self, picking, error, duration, results):
+        error_message = self._get_error_message(error, picking)
+        self.write({"state": "error", "error_message": error_message})
+        results[picking] = {
+            "state": "error",
+            "error_message": str(error),
+            "duration": duration,
+        }
+
+    def action_retry_failed(self):
+        """Validate again only the transfers which failed to validate."""
+        for shipment in self:
+            if shipment.state != "error":
+                raise UserError(
+                    _("Shipment {} is not in error, operation aborted.").format(
+                        shipment.name
+                    )
+                )
+            failed_results = shipment.validation_result_ids.filtered(
+                lambda r: r.state == "error"
+            )
+            if not failed_results:
+                raise UserError(
+                    _(
+                        "Shipment {} has no failed transfer to retry, mark it "
+                        "as done instead."
+                    ).format(shipment.name)
+                )
+            shipment._action_done(pickings=failed_results.picking_id)
+        return True
+
     def _unplan_undone_moves(self):
         """Unplan moves that were not loaded and validated"""
         self.ensure_one()
         if self.state != "in_process" or self.shipment_type != "outgoing":
             return
-        moves_to_unplan = (
-            self.loaded_move_line_ids.move_id | self.planned_move_ids
-        ).filtered(lambda m: m.state not in ("cancel", "done") and not m.quantity_done)
-        moves_to_unplan.shipment_advice_id = False
+        move_model = self.env["stock.move"]
+        move_model.flush_model(["state", "shipment_advice_id"])
+        self.env["stock.move.line"].flush_model(
+            ["move_id", "qty_done", "shipment_advice_id"]
+        )
+        self.env.cr.execute(
+            """
+            SELECT move.id
+            FROM stock_move move
+            WHERE move.shipment_advice_id IS NOT NULL
+                AND move.state NOT IN ('cancel', 'done')
+                AND (
+                    move.shipment_advice_id = %(shipment_id)s
+                    OR move.id IN (
+                        SELECT move_id
+                        FROM stock_move_line
+                        WHERE shipment_advice_id = %(shipment_id)s
+                    )
+                )
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM stock_move_line
+                    WHERE move_id = move.id AND qty_done > 0
+                )
+            """,
+            {"shipment_id": self.id},
+        )
+        moves_to_unplan = move_model.browse([row[0] for row in self.env.cr.fetchall()])
+        moves_to_unplan.write({"shipment_advice_id": False})
 
     def _postprocess_action_done(self):
         self.ensure_one()
@@ -489,24 +1107,251 @@ class ShipmentAdvice(models.Model):
                 ("id", "in", self.planned_picking_ids.ids),
             ]
         else:
-            domain += [
-                ("picking_type_id.code", "=", self.shipment_type),
-                ("picking_type_id.warehouse_id", "=", self.warehouse_id.id),
-                ("state", "=", "assigned"),
-                # Loaded in the current shipment or not loaded at all
-                "|",
-                ("move_line_ids.shipment_advice_id", "=", self.id),
-                ("move_line_ids.shipment_advice_id", "=", False),
-            ]
-            if self.planned_move_ids:
-                # and planned in the same shipment
-                domain.append(("move_ids.shipment_advice_id", "=", self.id))
-            else:
-                domain.append(("move_ids.shipment_advice_id", "=", False))
-            if self.carrier_ids:
-                domain.append(("carrier_id", "in", self.carrier_ids.ids))
+            # Evaluated on each search, with a single query
+            domain.append(("loadable_in_shipment_advice_id", "=", self.id))
         return domain
 
+    def _get_loadable_picking_query(self):
+        """Return the SQL query (and its parameters) selecting the ids of the
+        transfers which can be loaded in the shipment.
+
+        The transfers are ready, of the warehouse and type of the shipment,
+        have lines loaded in the shipment or not loaded at all, and moves
+        planned in the shipment (or not planned if the shipment has no
+        planned content).
+        """
+        self.ensure_one()
+        query = """
+            SELECT picking.id
+            FROM stock_picking picking
+            JOIN stock_picking_type picking_type
+                ON picking_type.id = picking.picking_type_id
+            WHERE picking.state = 'assigned'
+                AND picking_type.code = %s
+                AND picking_type.warehouse_id IS NOT DISTINCT FROM %s
+                AND EXISTS (
+                    SELECT 1
+                    FROM stock_move_line sml
+                    WHERE sml.picking_id = picking.id
+                        AND (sml.shipment_advice_id = %s
+                            OR sml.shipment_advice_id IS NULL)
+                )
+        """
+        params = [self.shipment_type, self.warehouse_id.id or None, self.id]
+        if self.planned_move_ids:
+            # and planned in the same shipment
+            query += """
+                AND EXISTS (
+                    SELECT 1
+                    FROM stock_move sm
+                    WHERE sm.picking_id = picking.id AND sm.shipment_advice_id = %s
+                )
+            """
+            params.append(self.id)
+        else:
+            query += """
+                AND EXISTS (
+                    SELECT 1
+                    FROM stock_move sm
+                    WHERE sm.picking_id = picking.id
+                        AND sm.shipment_advice_id IS NULL
+                )
+            """
+        if self.carrier_ids:
+            query += " AND picking.carrier_id IN %s"
+            params.append(tuple(self.carrier_ids.ids))
+        return query, params
+
+    def _scan_barcode(self, barcode, unload=False):
+        """Load (or unload) the package or product matching the barcode.
+
+        Used by the dock scanners, it bypasses the load/unload wizards and
+        returns the loading progress of the shipment.
+        """
+        self.ensure_one()
+        if self.state not in ("confirmed", "in_progress"):
+            raise UserError(
+                _("Shipment {} is not being loaded, operation aborted.").format(
+                    self.name
+                )
+            )
+        records = self._scan_resolve_barcode(barcode, unload=unload)
+        if not records:
+            raise UserError(
+                _("Nothing to {action} for barcode {barcode}.").format(
+                    action=_("unload") if unload else _("load"),
+                    barcode=barcode,
+                )
+            )
+        if unload:
+            records._unload_from_shipment()
+        else:
+            self._ensure_in_progress()
+            self._scan_load(records)
+        return self._scan_get_progress()
+
+    def _scan_load(self, records):
+        """Load the scanned package level or move line in the shipment.
+
+        The scanned content is resolved with the domains of the content which
+        can be loaded in the shipment (whole package levels, moves planned in
+        the shipment, lines not loaded yet), so the checks of the load wizard
+        are skipped. Content loaded concurrently is detected when locking it.
+        """
+        self.ensure_one()
+        records._write_load_in_shipment(self)
+
+    def _scan_resolve_barcode(self, barcode, unload=False):
+        """Return the package level or move line matching the barcode.
+
+        Packages are looked up by name and take precedence over products.
+        """
+        self.ensure_one()
+        if not unload:
+            records = self._scan_resolve_barcode_from_index(barcode)
+            if records:
+                return records
+        records = self._scan_search_barcode(barcode, unload=unload)
+        if records and not unload:
+            # The index missed this content, rebuild it on the next scan
+            self._scan_invalidate_index()
+        return records
+
+    def _scan_search_barcode(self, barcode, unload=False):
+        self.ensure_one()
+        package_level_domain, move_line_domain = self._scan_get_content_domains(
+            unload=unload
+        )
+        package_level = self.env["stock.package_level"].search(
+            [("package_id.name", "=", barcode)] + package_level_domain, limit=1
+        )
+        if package_level:
+            return package_level
+        return self.env["stock.move.line"].search(
+            [("product_id.barcode", "=", barcode)] + move_line_domain, limit=1
+        )
+
+    def _scan_get_content_domain(self, unload=False):
+        """Return the domain of the move lines which can be (un)loaded."""
+        self.ensure_one()
+        if unload:
+            return [("shipment_advice_id", "=", self.id)]
+        picking_query = self.env["stock.picking"]._search(
+            self._domain_open_deliveries_in_progress()
+        )
+        # Moves planned in the shipment, or not planned if it has no plan
+        planned_shipment_id = self.id if self.planned_move_ids else False
+        return [
+            ("picking_id", "in", picking_query),
+            ("move_id.shipment_advice_id", "=", planned_shipment_id),
+            ("shipment_advice_id", "=", False),
+            ("state", "in", ("partially_available", "assigned")),
+        ]
+
+    def _scan_get_content_domains(self, unload=False):
+        """Return the domains of the package levels and of the move lines
+        without package which can be (un)loaded by scanning."""
+        return self._scan_split_content_domain(
+            self._scan_get_content_domain(unload=unload)
+        )
+
+    def _scan_split_content_domain(self, content_domain):
+        """Return the domains of the package levels and of the move lines
+        without package from a domain of move lines."""
+        package_level_domain = [("state", "not in", ("done", "cancel"))] + [
+            ("move_line_ids." + leaf[0],) + leaf[1:] for leaf in content_domain
+        ]
+        move_line_domain = [("package_level_id", "=", False)] + content_domain
+        return package_level_domain, move_line_domain
+
+    def _scan_get_candidate_domain(self, planned_shipment_id):
+        """Return the domain of the indexed move lines still available to load.
+
+        Only the columns changed by loading and planning are checked, the
+        transfers in the scope of the shipment being the ones of the index.
+        """
+        return [
+            ("move_id.shipment_advice_id", "=", planned_shipment_id),
+            ("shipment_advice_id", "=", False),
+            ("state", "in", ("partially_available", "assigned")),
+            ("picking_id.state", "not in", ("done", "cancel")),
+        ]
+
+    def _scan_index_key(self):
+        dbname = self.env.cr.dbname
+        return (dbname, SCAN_INDEX_GENERATIONS[dbname], self.id)
+
+    def _scan_get_index(self):
+        """Return the barcode index of the content to load in the shipment."""
+        self.ensure_one()
+        key = self._scan_index_key()
+        index = SCAN_INDEX.get(key)
+        if index is None:
+            index = SCAN_INDEX[key] = self._scan_build_index()
+        return index
+
+    def _scan_build_index(self):
+        planned_shipment_id = self.id if self.planned_move_ids else False
+        lines = self.env["stock.move.line"].search(self._scan_get_content_domain())
+        index = defaultdict(lambda: ({}, {}))
+        for line in lines:
+            if line.package_level_id:
+                barcode = line.package_level_id.package_id.name
+                index[barcode][0][line.package_level_id.id] = True
+            elif line.product_id.barcode:
+                index[line.product_id.barcode][1][line.id] = True
+        return planned_shipment_id, {
+            barcode: (tuple(package_level_ids), tuple(move_line_ids))
+            for barcode, (package_level_ids, move_line_ids) in index.items()
+        }
+
+    def _scan_resolve_barcode_from_index(self, barcode):
+        """Return the first candidate of the index still available to load.
+
+        Content loaded, planned in another way or processed since the index
+        was built is ignored, without searching the transfers of the shipment
+        again.
+        """
+        planned_shipment_id, barcodes = self._scan_get_index()
+        package_level_ids, move_line_ids = barcodes.get(barcode, ((), ()))
+        if not package_level_ids and not move_line_ids:
+            return self.env["stock.package_level"]
+        package_level_domain, move_line_domain = self._scan_split_content_domain(
+            self._scan_get_candidate_domain(planned_shipment_id)
+        )
+        if package_level_ids:
+            package_level = self.env["stock.package_level"].search(
+                [("id", "in", package_level_ids)] + package_level_domain, limit=1
+            )
+            if package_level:
+                return package_level
+        if not move_line_ids:
+            return self.env["stock.move.line"]
+        return self.env["stock.move.line"].search(
+            [("id", "in", move_line_ids)] + move_line_domain, limit=1
+        )
+
+    def _scan_invalidate_index(self):
+        """Drop the barcode index of the shipments (of all shipments if empty)."""
+        if not self:
+            SCAN_INDEX_GENERATIONS[self.env.cr.dbname] += 1
+            return
+        for shipment in self:
+            SCAN_INDEX.pop(shipment._scan_index_key(), None)
+
+    def _scan_get_progress(self):
+        """Return the loading progress of the shipment for the scanners."""
+        self.ensure_one()
+        fnames = [
+            "state",
+            "loaded_pickings_count",
+            "loaded_packages_count",
+            "loaded_move_lines_without_package_count",
+            "total_load",
+        ]
+        self.invalidate_recordset(fnames[1:])
+        return dict(self.read(fnames)[0], name=self.name)
+
     def button_open_deliveries_in_progress(self):
         action_xmlid = "stock.action_picking_tree_all"
         action = self.env["ir.actions.act_window"]._for_xml_id(action_xmlid)
@@ -0,0 +1,169 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import UserError
+
+
+class ShipmentAdviceLoadEvent(models.Model):
+    """Append-only journal of the content (un)loaded in shipment advices."""
+
+    _name = "shipment.advice.load.event"
+    _description = "Shipment Advice Load Event"
+    _order = "date DESC, id DESC"
+    # 'date' and 'user_id' are the only audit data we need
+    _log_access = False
+
+    date = fields.Datetime(
+        required=True,
+        readonly=True,
+        default=fields.Datetime.now,
+    )
+    user_id = fields.Many2one(
+        comodel_name="res.users",
+        string="Operator",
+        required=True,
+        readonly=True,
+        default=lambda self: self.env.user,
+    )
+    shipment_advice_id = fields.Many2one(
+        comodel_name="shipment.advice",
+        ondelete="cascade",
+        required=True,
+        readonly=True,
+    )
+    dock_id = fields.Many2one(
+        comodel_name="stock.dock",
+        ondelete="set null",
+        readonly=True,
+    )
+    move_line_id = fields.Many2one(
+        comodel_name="stock.move.line",
+        ondelete="set null",
+        readonly=True,
+    )
+    package_level_id = fields.Many2one(
+        comodel_name="stock.package_level",
+        ondelete="set null",
+        readonly=True,
+    )
+    event_type = fields.Selection(
+        selection=[("load", "Load"), ("unload", "Unload")],
+        required=True,
+        readonly=True,
+    )
+    quantity = fields.Float(
+        digits="Product Unit of Measure",
+        readonly=True,
+        help="Quantity loaded in the shipment, negative when unloaded.",
+    )
+
+    def init(self):
+        tools.create_index(
+            self.env.cr,
+            "shipment_advice_load_event_shipment_date_index",
+            self._table,
+            ["shipment_advice_id", "date"],
+        )
+        tools.create_index(
+            self.env.cr,
+            "shipment_advice_load_event_dock_date_index",
+            self._table,
+            ["dock_id", "date"],
+        )
+
+    def write(self, vals):
+        raise UserError(_("Shipment load events cannot be modified."))
+
+    def unlink(self):
+        raise UserError(_("Shipment load events cannot be deleted."))
+
+    @api.model
+    def _log_events(self, move_lines, event_type):
+        """Journal the (un)loading of the move lines in their shipment."""
+        sign = -1 if event_type == "unload" else 1
+        vals_list = [
+            {
+                "shipment_advice_id": line.shipment_advice_id.id,
+                "dock_id": line.shipment_advice_id.dock_id.id,
+                "move_line_id": line.id,
+                "package_level_id": line.package_level_id.id,
+                "event_type": event_type,
+                "quantity": sign * line.qty_done,
+            }
+            for line in move_lines
+            if line.shipment_advice_id
+        ]
+        return self.sudo().create(vals_list)
+
+    @api.model
+    def _get_loading_rates(self, dock_ids=None, date_from=None, date_to=None):
+        """Return the net quantity and the events (un)loaded per dock and hour.
+
+        Return a list of dicts {"dock_id", "hour", "quantity", "count"}.
+        """
+        domain = [("dock_id", "!=", False)]
+        if dock_ids:
+            domain.append(("dock_id", "in", dock_ids))
+        if date_from:
+            domain.append(("date", ">=", date_from))
+        if date_to:
+            domain.append(("date", "<", date_to))
+        groups = self.read_group(
+            domain,
+            ["quantity:sum"],
+            ["dock_id", "date:hour"],
+            orderby="dock_id, date:hour",
+            lazy=False,
+        )
+        return [
+            {
+                "dock_id": group["dock_id"][0],
+                "hour": group["date:hour"],
+                "quantity": group["quantity"],
+                "count": group["__count"],
+            }
+            for group in groups
+        ]
+
+    @api.model
+    def _get_loading_progress(self, shipment_ids):
+        """Return the content currently loaded in the shipments.
+
+        Return a dict {shipment_id: {"quantity", "move_lines", "packages"}}
+        where "move_lines" counts the lines loaded without package.
+        """
+        if not shipment_ids:
+            return {}
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            WITH balance AS (
+                SELECT
+                    shipment_advice_id,
+                    move_line_id,
+                    package_level_id,
+                    SUM(quantity) AS quantity,
+                    SUM(CASE event_type WHEN 'load' THEN 1 ELSE -1 END) AS loaded
+                FROM shipment_advice_load_event
+                WHERE shipment_advice_id IN %s
+                GROUP BY shipment_advice_id, move_line_id, package_level_id
+            )
+            SELECT
+                shipment_advice_id,
+                SUM(quantity),
+                COUNT(*) FILTER (WHERE loaded > 0 AND package_level_id IS NULL),
+                COUNT(DISTINCT package_level_id) FILTER (WHERE loaded > 0)
+            FROM balance
+            GROUP BY shipment_advice_id
+            """,
+            (tuple(shipment_ids),),
+        )
+        return {
+            shipment_id: {
+                "quantity": quantity,
+                "move_lines": move_lines,
+                "packages": packages,
+            }
+            for shipment_id, quantity, move_lines, packages in self.env.cr.fetchall()
+        }
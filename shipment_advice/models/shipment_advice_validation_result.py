@@ -0,0 +1,54 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+from odoo import fields, models
+
+
+class ShipmentAdviceValidationResult(models.Model):
+    _name = "shipment.advice.validation.result"
+    _description = "Shipment Advice Transfer Validation Result"
+    _order = "shipment_advice_id, id"
+
+    shipment_advice_id = fields.Many2one(
+        comodel_name="shipment.advice",
+        ondelete="cascade",
+        required=True,
+        index=True,
+        readonly=True,
+    )
+    picking_id = fields.Many2one(
+        comodel_name="stock.picking",
+        string="Transfer",
+        ondelete="cascade",
+        required=True,
+        index=True,
+        readonly=True,
+    )
+    state = fields.Selection(
+        selection=[
+            ("pending", "Pending"),
+            ("done", "Done"),
+            ("open", "Left open"),
+            ("error", "Error"),
+        ],
+        string="Status",
+        default="pending",
+        required=True,
+        readonly=True,
+    )
+    error_message = fields.Text(readonly=True)
+    duration = fields.Float(
+        string="Duration (s)",
+        digits=(16, 3),
+        readonly=True,
+        help="Time spent to validate the transfer.",
+    )
+    job_uuid = fields.Char(string="Job UUID", readonly=True)
+
+    _sql_constraints = [
+        (
+            "shipment_picking_uniq",
+            "unique(shipment_advice_id, picking_id)",
+            "A transfer can only have one validation result per shipment advice!",
+        ),
+    ]
@@ -15,6 +15,65 @@ class StockMove(models.Model):
         copy=False,
     )
 
+    def write(self, vals):
+        if "shipment_advice_id" in vals and not vals["shipment_advice_id"]:
+            # Unplanning makes content available to every shipment again
+            self.env["shipment.advice"]._scan_invalidate_index()
+        return super().write(vals)
+
     def _plan_in_shipment(self, shipment_advice):
         """Plan the moves into the given shipment advice."""
         self.shipment_advice_id = shipment_advice
+
+    def _get_moves_in_partial_packages(self):
+        """Return the moves sharing a package level with moves outside `self`.
+
+        Package levels are linked to moves through their move lines and
+        through the moves themselves: all the package levels touched by the
+        moves are gathered at once and those also referencing other moves
+        are excluded in the same query.
+        """
+        if not self:
+            return self
+        self.flush_model(["package_level_id"])
+        self.env["stock.move.line"].flush_model(["move_id", "package_level_id"])
+        self.env.cr.execute(
+            """
+            WITH selection AS (
+                SELECT unnest(%(ids)s::integer[]) AS move_id
+            ),
+            touched_level AS (
+                SELECT line.package_level_id
+                FROM stock_move_line line
+                JOIN selection USING (move_id)
+                WHERE line.package_level_id IS NOT NULL
+                UNION
+                SELECT move.package_level_id
+                FROM stock_move move
+                JOIN selection ON selection.move_id = move.id
+                WHERE move.package_level_id IS NOT NULL
+            ),
+            level_move AS (
+                SELECT line.package_level_id, line.move_id
+                FROM stock_move_line line
+                JOIN touched_level USING (package_level_id)
+                WHERE line.move_id IS NOT NULL
+                UNION
+                SELECT move.package_level_id, move.id
+                FROM stock_move move
+                JOIN touched_level USING (package_level_id)
+            ),
+            partial_level AS (
+                SELECT DISTINCT level_move.package_level_id
+                FROM level_move
+                LEFT JOIN selection USING (move_id)
+                WHERE selection.move_id IS NULL
+            )
+            SELECT DISTINCT level_move.move_id
+            FROM level_move
+            JOIN partial_level USING (package_level_id)
+            JOIN selection USING (move_id)
+            """,
+            {"ids": list(self.ids)},
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
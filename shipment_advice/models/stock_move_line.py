@@ -3,7 +3,7 @@
 
 from odoo import _, fields, models
 from odoo.exceptions import UserError
-from odoo.tools import float_is_zero
+from odoo.tools import float_is_zero, groupby
 
 
 class StockMoveLine(models.Model):
@@ -16,6 +16,21 @@ class StockMoveLine(models.Model):
         index=True,
     )
 
+    def write(self, vals):
+        if "shipment_advice_id" in vals and not vals["shipment_advice_id"]:
+            # Unloading makes content available to every shipment again
+            self.env["shipment.advice"]._scan_invalidate_index()
+        if "shipment_advice_id" in vals:
+            pickings = self.picking_id
+        elif "qty_done" in vals:
+            pickings = self.filtered("shipment_advice_id").picking_id
+        else:
+            pickings = self.env["stock.picking"]
+        res = super().write(vals)
+        if pickings:
+            pickings._delay_update_shipment_loaded_progress()
+        return res
+
     def button_load_in_shipment(self):
         action_xmlid = "shipment_advice.wizard_load_shipment_picking_action"
         action = self.env["ir.actions.act_window"]._for_xml_id(action_xmlid)
@@ -28,100 +43,164 @@ class StockMoveLine(models.Model):
 
     def _check_entire_package(self):
         """Check that the lines represent whole packages (if applicable)."""
-        for move_line in self:
-            if move_line.package_level_id:
-                package_lines = move_line.package_level_id.move_line_ids.filtered(
-                    lambda l: l.state in ("partially_available", "assigned")
-                )
-                if not set(package_lines.ids).issubset(set(self.ids)):
-                    return False
-        return True
+        return not self._get_incomplete_package_levels()
+
+    def _get_incomplete_package_levels(self):
+        """Return the package levels whose active lines are not all in `self`."""
+        package_levels = self.package_level_id
+        if not package_levels:
+            return package_levels
+        active_lines = self.search(
+            [
+                ("package_level_id", "in", package_levels.ids),
+                ("state", "in", ("partially_available", "assigned")),
+            ]
+        )
+        return (active_lines - self).package_level_id
+
+    def _get_incomplete_package_levels_info(self, package_levels):
+        move_lines = package_levels.move_line_ids
+        pickings = move_lines.picking_id.mapped("name")
+        products = move_lines.product_id.mapped("display_name")
+        packages = package_levels.package_id.mapped("display_name")
+        return "\n".join(
+            [
+                _("Transfers: %s", ", ".join(pickings)),
+                _("Products: %s", ", ".join(products)),
+                _("Packages: %s", ", ".join(packages)),
+            ]
+        )
 
     def _load_in_shipment(self, shipment_advice):
         """Load the move lines into the given shipment advice."""
+        self._check_load_in_shipment(shipment_advice)
+        self._write_load_in_shipment(shipment_advice)
+
+    def _write_load_in_shipment(self, shipment_advice):
+        """Load the move lines into the shipment advice, without checking them.
+
+        The lines must have been checked beforehand, either by
+        `_check_load_in_shipment` or by the domain they have been found with.
+        """
+        self._lock_for_shipment()
+        self.write({"shipment_advice_id": shipment_advice.id})
+        # Set the done quantities with one write per distinct quantity
+        lines_to_set = self.filtered(
+            lambda l: l.state in ("partially_available", "assigned")
+        )
+        for qty, lines in groupby(lines_to_set, key=lambda l: l.reserved_uom_qty):
+            self.browse([line.id for line in lines]).write({"qty_done": qty})
+        self.env["shipment.advice.load.event"]._log_events(self, "load")
+
+    def _check_load_in_shipment(self, shipment_advice):
+        """Raise an error if the lines can't be loaded in the shipment."""
         # Entire package check
-        if not self._check_entire_package():
-            move_lines = self.package_level_id.move_line_ids
-            pickings = move_lines.picking_id.mapped("name")
-            products = move_lines.product_id.mapped("display_name")
-            packages = move_lines.package_id.mapped("display_name")
+        incomplete_package_levels = self._get_incomplete_package_levels()
+        if incomplete_package_levels:
             raise UserError(
                 _(
                     "You cannot load this move line alone, you have to "
                     "move the whole package content.\n%(info)s",
+                    info=self._get_incomplete_package_levels_info(
+                        incomplete_package_levels
+                    ),
+                )
+            )
+        errors = self._get_load_in_shipment_errors(shipment_advice)
+        if errors:
+            raise UserError("\n\n".join(errors))
+
+    def _get_load_in_shipment_errors(self, shipment_advice):
+        """Return the messages explaining why the lines can't be loaded."""
+        errors = []
+        # Shipment has to be the planned one (if any)
+        planned_elsewhere = self.filtered(
+            lambda l: l.move_id.shipment_advice_id
+            and l.move_id.shipment_advice_id != shipment_advice
+        )
+        for planned_shipment in planned_elsewhere.move_id.shipment_advice_id:
+            errors.append(
+                _(
+                    "You cannot load this into this shipment as it has been "
+                    "planned to be loaded in {}"
+                ).format(planned_shipment.name)
+            )
+        # If no planned shipment, allow the loading only if the shipment
+        # is not a planned one
+        not_planned = self.filtered(lambda l: not l.move_id.shipment_advice_id)
+        if not_planned and self.env["stock.move"].search(
+            [("shipment_advice_id", "=", shipment_advice.id)], limit=1
+        ):
+            errors.extend(
+                _(
+                    "You cannot load this into this shipment because its "
+                    "content is planned already.\n%(info)s",
                     info="\n".join(
                         [
-                            _("Transfers: %s", ", ".join(pickings)),
-                            _("Products: %s", ", ".join(products)),
-                            _("Packages: %s", ", ".join(packages)),
+                            _("Transfer: %s", move_line.picking_id.name),
+                            _("Product: %s", move_line.product_id.display_name),
                         ]
                     ),
                 )
+                for move_line in not_planned
             )
-        for move_line in self:
-            # Shipment has to be the planned one (if any)
-            planned_shipment = move_line.move_id.shipment_advice_id
-            if planned_shipment and planned_shipment != shipment_advice:
-                raise UserError(
-                    _(
-                        "You cannot load this into this shipment as it has been "
-                        "planned to be loaded in {}"
-                    ).format(planned_shipment.name)
-                )
-            # If no planned shipment, allow the loading only if the shipment
-            # is not a planned one
-            elif not planned_shipment and shipment_advice.planned_move_ids:
-                raise UserError(
-                    _(
-                        "You cannot load this into this shipment because its "
-                        "content is planned already.\n%(info)s",
-                        info="\n".join(
-                            [
-                                _("Transfer: %s", move_line.picking_id.name),
-                                _("Product: %s", move_line.product_id.display_name),
-                            ]
-                        ),
-                    )
-                )
-            if (
-                move_line.shipment_advice_id
-                and move_line.shipment_advice_id != shipment_advice
-            ):
-                raise UserError(
-                    _(
-                        "This move is already loaded  in another shipment."
-                        "\nProduct: %(product)s.\nPicking: %(picking)s",
-                        product=move_line.product_id.display_name,
-                        picking=move_line.picking_id.name,
-                    )
-                )
-            move_line.shipment_advice_id = shipment_advice
-            uom = move_line.product_uom_id or move_line.product_id.uom_id
-            if float_is_zero(
-                move_line.reserved_uom_qty, precision_rounding=uom.rounding
-            ):
-                raise UserError(
-                    _(
-                        "Nothing to load for %(product)s.\nPicking: %(picking)s",
-                        product=move_line.product_id.display_name,
-                        picking=move_line.picking_id.name,
-                    )
-                )
-            if move_line.state in ("partially_available", "assigned"):
-                move_line.qty_done = move_line.reserved_uom_qty
+        loaded_elsewhere = self.filtered(
+            lambda l: l.shipment_advice_id and l.shipment_advice_id != shipment_advice
+        )
+        errors.extend(
+            _(
+                "This move is already loaded  in another shipment."
+                "\nProduct: %(product)s.\nPicking: %(picking)s",
+                product=move_line.product_id.display_name,
+                picking=move_line.picking_id.name,
+            )
+            for move_line in loaded_elsewhere
+        )
+        nothing_to_load = self.filtered(
+            lambda l: float_is_zero(
+                l.reserved_uom_qty,
+                precision_rounding=(l.product_uom_id or l.product_id.uom_id).rounding,
+            )
+        )
+        errors.extend(
+            _(
+                "Nothing to load for %(product)s.\nPicking: %(picking)s",
+                product=move_line.product_id.display_name,
+                picking=move_line.picking_id.name,
+            )
+            for move_line in nothing_to_load
+        )
+        return errors
 
     def _unload_from_shipment(self):
         """Unload the move lines from their related shipment advice."""
-        if not self._check_entire_package():
+        incomplete_package_levels = self._get_incomplete_package_levels()
+        if incomplete_package_levels:
             raise UserError(
                 _(
                     "You cannot unload this move line alone, you have to "
-                    "unload the whole package content."
+                    "unload the whole package content.\n%(info)s",
+                    info=self._get_incomplete_package_levels_info(
+                        incomplete_package_levels
+                    ),
                 )
             )
+        self._lock_for_shipment()
+        self.env["shipment.advice.load.event"]._log_events(self, "unload")
         self.shipment_advice_id = False
         self.qty_done = 0
 
+    def _lock_for_shipment(self):
+        """Lock the lines and package levels being (un)loaded.
+
+        Only the touched rows are locked, always in the same order, so that
+        operators (un)loading different content of the same shipment never
+        wait for each other.
+        """
+        shipment_model = self.env["shipment.advice"]
+        shipment_model._lock_records(self.package_level_id)
+        shipment_model._lock_records(self)
+
     def _is_loaded_in_shipment(self):
         """Return `True` if the move lines are loaded in a shipment."""
         return all([line.qty_done and line.shipment_advice_id for line in self])
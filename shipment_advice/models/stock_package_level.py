@@ -23,8 +23,14 @@ class StockPackageLevel(models.Model):
 
     def _load_in_shipment(self, shipment_advice):
         """Load the package levels into the given shipment advice."""
+        self.move_line_ids._check_load_in_shipment(shipment_advice)
+        self._write_load_in_shipment(shipment_advice)
+
+    def _write_load_in_shipment(self, shipment_advice):
+        """Load the package levels into the shipment advice, without checking
+        their move lines (see `stock.move.line._write_load_in_shipment`)."""
         self.is_done = True
-        self.move_line_ids._load_in_shipment(shipment_advice)
+        self.move_line_ids._write_load_in_shipment(shipment_advice)
 
     def _unload_from_shipment(self):
         """Unload the package levels from their related shipment advice."""
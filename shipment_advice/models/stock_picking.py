@@ -1,9 +1,13 @@
 # Copyright 2021 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
-from odoo import api, fields, models
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.osv import expression
 from odoo.tools import float_round
 
+from odoo.addons.queue_job.job import identity_exact
+
 
 class StockPicking(models.Model):
     _inherit = "stock.picking"
@@ -17,79 +21,210 @@ class StockPicking(models.Model):
     is_fully_loaded_in_shipment = fields.Boolean(
         string="Is fully loaded in a shipment?",
         compute="_compute_loaded_in_shipment",
+        search="_search_is_fully_loaded_in_shipment",
     )
     is_partially_loaded_in_shipment = fields.Boolean(
         string="Is partially loaded in a shipment?",
         compute="_compute_loaded_in_shipment",
+        search="_search_is_partially_loaded_in_shipment",
     )
     loaded_packages_count = fields.Integer(
         "Packages loaded",
         compute="_compute_shipment_loaded_progress",
+        store=True,
     )
     total_packages_count = fields.Integer(
         "Total packages",
         compute="_compute_shipment_loaded_progress",
+        store=True,
     )
     loaded_move_lines_count = fields.Integer(
         "Bulk lines loaded",
         compute="_compute_shipment_loaded_progress",
+        store=True,
     )
     total_move_lines_count = fields.Integer(
         "Total bulk lines",
         compute="_compute_shipment_loaded_progress",
+        store=True,
     )
     loaded_packages_progress_f = fields.Float(
         "Packages loaded/total %",
         digits=(3, 2),
         compute="_compute_shipment_loaded_progress",
+        store=True,
     )
     loaded_move_lines_progress_f = fields.Float(
         "Bulk lines loaded/total %",
         digits=(3, 2),
         compute="_compute_shipment_loaded_progress",
+        store=True,
     )
     loaded_progress_f = fields.Float(
-        "Loaded/total %", digits=(3, 2), compute="_compute_shipment_loaded_progress"
+        "Loaded/total %",
+        digits=(3, 2),
+        compute="_compute_shipment_loaded_progress",
+        store=True,
     )
     loaded_progress = fields.Char(
-        "Loaded/total", compute="_compute_shipment_loaded_progress"
+        "Loaded/total", compute="_compute_shipment_loaded_progress", store=True
     )
     loaded_packages_progress = fields.Char(
-        "Packages loaded/total", compute="_compute_shipment_loaded_progress"
+        "Packages loaded/total",
+        compute="_compute_shipment_loaded_progress",
+        store=True,
     )
     loaded_move_lines_progress = fields.Char(
-        "Bulk lines loaded/total", compute="_compute_shipment_loaded_progress"
+        "Bulk lines loaded/total",
+        compute="_compute_shipment_loaded_progress",
+        store=True,
+    )
+    loaded_weight = fields.Integer(
+        compute="_compute_shipment_loaded_progress", store=True
     )
-    loaded_weight = fields.Integer(compute="_compute_shipment_loaded_progress")
     loaded_weight_progress = fields.Char(
-        "Weight/total", compute="_compute_shipment_loaded_progress"
+        "Weight/total", compute="_compute_shipment_loaded_progress", store=True
     )
     loaded_shipment_advice_ids = fields.Many2many(
         "shipment.advice",
         compute="_compute_loaded_in_shipment",
     )
+    loadable_in_shipment_advice_id = fields.Many2one(
+        comodel_name="shipment.advice",
+        compute="_compute_loadable_in_shipment_advice_id",
+        search="_search_loadable_in_shipment_advice_id",
+        help="Technical field to search the transfers which can currently be "
+        "loaded in a shipment.",
+    )
+
+    # NOTE: Make overloading containers possible,
+    # otherwise overloaded container would be marked as partially loaded
+    _not_fully_loaded_line_condition = (
+        "shipment_advice_id IS NULL OR qty_done < reserved_uom_qty"
+    )
+    _loaded_line_condition = "shipment_advice_id IS NOT NULL AND qty_done > 0"
 
-    @api.depends("move_line_ids.shipment_advice_id")
+    @api.depends(
+        "move_line_ids.shipment_advice_id",
+        "move_line_ids.qty_done",
+        "move_line_ids.reserved_uom_qty",
+    )
     def _compute_loaded_in_shipment(self):
+        loading_data = self._get_loading_data()
         for picking in self:
-            # NOTE: Make overloading containers possible,
-            # otherwise overloaded container would be marked as partially loaded
-            picking.is_fully_loaded_in_shipment = all(
-                line.shipment_advice_id and line.qty_done >= line.reserved_uom_qty
-                for line in picking.move_line_ids
+            fully_loaded, partially_loaded, shipment_ids = loading_data.get(
+                picking._origin.id, (True, False, [])
             )
+            picking.is_fully_loaded_in_shipment = fully_loaded
             picking.is_partially_loaded_in_shipment = (
-                not picking.is_fully_loaded_in_shipment
-                and any(
-                    line.shipment_advice_id and line.qty_done > 0
-                    for line in picking.move_line_ids
-                )
+                not fully_loaded and partially_loaded
             )
-            picking.loaded_shipment_advice_ids = (
-                picking.move_line_ids.shipment_advice_id
+            picking.loaded_shipment_advice_ids = self.env["shipment.advice"].browse(
+                shipment_ids
             )
 
-    @api.depends("package_level_ids.package_id", "move_line_ids")
+    def _get_loading_data(self):
+        """Aggregate the loading status of the move lines of the transfers.
+
+        Return a dict {picking_id: (fully loaded, partially loaded, shipment ids)}
+        computed with a single grouped query.
+        """
+        ids = self._origin.ids
+        if not ids:
+            return {}
+        self.env["stock.move.line"].flush_model(
+            ["picking_id", "shipment_advice_id", "qty_done", "reserved_uom_qty"]
+        )
+        self.env.cr.execute(
+            f"""
+            SELECT
+                picking_id,
+                NOT bool_or({self._not_fully_loaded_line_condition}),
+                bool_or({self._loaded_line_condition}),
+                array_agg(DISTINCT shipment_advice_id)
+                    FILTER (WHERE shipment_advice_id IS NOT NULL)
+            FROM stock_move_line
+            WHERE picking_id IN %s
+            GROUP BY picking_id
+            """,
+            (tuple(ids),),
+        )
+        return {
+            picking_id: (fully_loaded, partially_loaded, shipment_ids or [])
+            for (
+                picking_id,
+                fully_loaded,
+                partially_loaded,
+                shipment_ids,
+            ) in self.env.cr.fetchall()
+        }
+
+    def _search_is_fully_loaded_in_shipment(self, operator, value):
+        if operator not in ("=", "!="):
+            raise UserError(_("Unsupported search operator %s", operator))
+        self.env["stock.move.line"].flush_model(
+            ["picking_id", "shipment_advice_id", "qty_done", "reserved_uom_qty"]
+        )
+        query = f"""
+            SELECT picking_id
+            FROM stock_move_line
+            WHERE picking_id IS NOT NULL
+                AND ({self._not_fully_loaded_line_condition})
+        """
+        if (operator == "=" and value) or (operator == "!=" and not value):
+            return [("id", "not inselect", (query, []))]
+        return [("id", "inselect", (query, []))]
+
+    def _search_is_partially_loaded_in_shipment(self, operator, value):
+        if operator not in ("=", "!="):
+            raise UserError(_("Unsupported search operator %s", operator))
+        self.env["stock.move.line"].flush_model(
+            ["picking_id", "shipment_advice_id", "qty_done", "reserved_uom_qty"]
+        )
+        query = f"""
+            SELECT picking_id
+            FROM stock_move_line
+            WHERE picking_id IS NOT NULL
+                AND ({self._loaded_line_condition})
+        """
+        domain = [
+            ("id", "inselect", (query, [])),
+            ("is_fully_loaded_in_shipment", "=", False),
+        ]
+        if (operator == "=" and value) or (operator == "!=" and not value):
+            return domain
+        return ["!"] + expression.normalize_domain(domain)
+
+    def _compute_loadable_in_shipment_advice_id(self):
+        self.loadable_in_shipment_advice_id = False
+
+    def _search_loadable_in_shipment_advice_id(self, operator, value):
+        if operator not in ("=", "in"):
+            raise UserError(_("Unsupported search operator %s", operator))
+        shipments = self.env["shipment.advice"].browse(value)
+        if not shipments:
+            return expression.FALSE_DOMAIN
+        self.flush_model(["state", "picking_type_id", "carrier_id"])
+        self.env["stock.move"].flush_model(["picking_id", "shipment_advice_id"])
+        self.env["stock.move.line"].flush_model(["picking_id", "shipment_advice_id"])
+        queries = []
+        params = []
+        for shipment in shipments:
+            query, query_params = shipment._get_loadable_picking_query()
+            queries.append(query)
+            params.extend(query_params)
+        return [("id", "inselect", (" UNION ".join(queries), params))]
+
+    # NOTE: the loading and unloading of the lines are not dependencies, the
+    # progress is updated by `_delay_update_shipment_loaded_progress` instead
+    @api.depends(
+        "package_level_ids.package_id.shipping_weight",
+        "move_line_ids.package_level_id",
+        "move_line_ids.result_package_id.shipping_weight",
+        "move_line_ids.move_id.weight",
+        "shipping_weight",
+        "picking_type_id.show_entire_packs",
+    )
     def _compute_shipment_loaded_progress(self):
         for picking in self:
             picking.loaded_packages_count = 0
@@ -161,6 +296,27 @@ class StockPicking(models.Model):
                 picking.loaded_progress_f = picking.loaded_move_lines_progress_f
                 picking.loaded_progress = picking.loaded_move_lines_progress
 
+    def _delay_update_shipment_loaded_progress(self):
+        """Update the loading progress of the transfers in a job.
+
+        The progress is not written by the loading transaction itself, so
+        that operators loading different content of the same transfer at the
+        same time do not conflict on the transfer.
+        """
+        self.with_delay(
+            identity_key=identity_exact,
+            description=_("Update the loading progress of transfers"),
+        )._update_shipment_loaded_progress()
+
+    def _update_shipment_loaded_progress(self):
+        """Recompute the loading progress stored on the transfers."""
+        pickings = self.exists()
+        compute_method = self._fields["loaded_progress"].compute
+        for field in self._fields.values():
+            if field.compute == compute_method:
+                self.env.add_to_compute(field, pickings)
+        pickings.flush_recordset()
+
     def button_plan_in_shipment(self):
         action_xmlid = "shipment_advice.wizard_plan_shipment_picking_action"
         action = self.env["ir.actions.act_window"]._for_xml_id(action_xmlid)
@@ -4,3 +4,7 @@ from . import test_shipment_advice_plan
 from . import test_shipment_advice_load
 from . import test_shipment_advice_unload
 from . import test_shipment_advice_stock_user
+from . import test_shipment_advice_scan
+from . import test_shipment_advice_concurrency
+from . import test_shipment_advice_load_event
+from . import test_stock_picking_loading
@@ -163,3 +163,20 @@ class TestShipmentAdvice(Common):
         self._cancel_shipment_advice(self.shipment_advice_out)
         self.shipment_advice_out.action_draft()
         self.assertEqual(self.shipment_advice_out.state, "draft")
+
+    def test_shipment_advice_create_multi(self):
+        sequence = self.env.ref("shipment_advice.shipment_advice_outgoing_sequence")
+        for implementation in ("standard", "no_gap"):
+            sequence.implementation = implementation
+            shipments = self.env["shipment.advice"].create(
+                [{"shipment_type": "outgoing"} for __ in range(3)]
+                + [{"shipment_type": "incoming"}]
+            )
+            names = shipments.mapped("name")
+            self.assertEqual(len(set(names)), 4)
+            for shipment in shipments:
+                self._check_sequence(shipment)
+            out_numbers = [int(name.split("/")[-1]) for name in names[:3]]
+            self.assertEqual(
+                out_numbers, list(range(out_numbers[0], out_numbers[0] + 3))
+            )
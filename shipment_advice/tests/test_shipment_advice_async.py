@@ -1,7 +1,11 @@
 # Copyright 2021 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
+from unittest import mock
 
+from odoo.exceptions import UserError, ValidationError
+
+from odoo.addons.queue_job.exception import RetryableJobError
 from odoo.addons.queue_job.tests.common import trap_jobs
 
 from .common import Common
@@ -223,6 +227,15 @@ class TestShipmentAdvice(Common):
         self.assertEqual(pickings[0].state, "assigned")
         self.assertEqual(pickings[1].state, "done")
         self.assertEqual(pickings[2].state, "done")
+        results = self.shipment_advice_out.validation_result_ids
+        self.assertEqual(results.picking_id, pickings)
+        failed_result = results.filtered(lambda r: r.state == "error")
+        self.assertEqual(failed_result.picking_id, pickings[0])
+        self.assertIn(
+            "You cannot move the same package content more than once",
+            failed_result.error_message,
+        )
+        self.assertEqual((results - failed_result).mapped("state"), ["done", "done"])
         return pickings[0]
 
     def test_shipment_advice_error_fix_and_retry(self):
@@ -299,3 +312,178 @@ class TestShipmentAdvice(Common):
         self.assertEqual(len(self.shipment_advice_out.planned_move_ids), 2)
         self.assertTrue(picking.backorder_ids)
         self.assertFalse(picking.backorder_ids.move_ids.shipment_advice_id)
+
+    def test_shipment_advice_done_chunked(self):
+        """Pickings are validated by chunks of the configured size."""
+        company = self.shipment_advice_out.company_id
+        company.shipment_advice_validation_chunk_size = 2
+        pickings = self.move1.picking_id | self.move2.picking_id | self.move3.picking_id
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        self._load_records_in_shipment(self.shipment_advice_out, pickings)
+        with trap_jobs() as trap:
+            self.shipment_advice_out.action_done()
+            trap.assert_jobs_count(4)  # 2 chunks + 1 for unplan + 1 for postprocess
+            jobs = trap.enqueued_jobs
+            picking_jobs = self._filter_jobs(jobs, "_validate_picking")
+            self.assertEqual(
+                sorted(len(job.args[0]) for job in picking_jobs),
+                [1, 2],
+            )
+            self._asset_jobs_dependency(jobs)
+            trap.perform_enqueued_jobs()
+        self.assertEqual(self.shipment_advice_out.state, "done")
+        self.assertEqual(pickings.mapped("state"), ["done", "done", "done"])
+
+    def test_shipment_advice_validation_chunk_size_positive(self):
+        company = self.shipment_advice_out.company_id
+        for chunk_size in (0, -1):
+            with self.assertRaises(ValidationError):
+                company.shipment_advice_validation_chunk_size = chunk_size
+
+    def test_shipment_advice_error_batch_validation(self):
+        """In batch mode, the failing picking is isolated by bisection and
+        the other pickings are validated.
+        """
+        company = self.shipment_advice_out.company_id
+        company.shipment_advice_validation_chunk_size = 3
+        company.shipment_advice_batch_validation = True
+        pickings = self.move1.picking_id | self.move2.picking_id | self.move3.picking_id
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        self._load_records_in_shipment(self.shipment_advice_out, pickings)
+        # provoke validation error by setting internal package as destination
+        pickings[1].move_line_ids.result_package_id = self.package
+        with trap_jobs() as trap:
+            self.shipment_advice_out.action_done()
+            trap.assert_jobs_count(3)  # 1 chunk + 1 for unplan + 1 for postprocess
+            self._asset_jobs_dependency(trap.enqueued_jobs)
+            trap.perform_enqueued_jobs()
+        self.assertEqual(self.shipment_advice_out.state, "error")
+        self.assertIn(pickings[1].name, self.shipment_advice_out.error_message)
+        self.assertEqual(pickings[0].state, "done")
+        self.assertEqual(pickings[1].state, "assigned")
+        self.assertEqual(pickings[2].state, "done")
+
+    def test_shipment_advice_lock_pickings(self):
+        pickings = self.move1.picking_id | self.move2.picking_id | self.move3.picking_id
+        shipment = self.shipment_advice_out
+        for lock_mode in ("wait", "nowait", "skip_locked"):
+            locked = shipment._lock_records(pickings, lock_mode=lock_mode)
+            self.assertEqual(locked, pickings)
+
+    def test_shipment_advice_lock_contention(self):
+        """Pickings locked by another transaction postpone the job."""
+        shipment = self.shipment_advice_out
+        shipment.company_id.shipment_advice_lock_mode = "skip_locked"
+        pickings = self.move1.picking_id | self.move2.picking_id
+        with mock.patch.object(
+            type(shipment), "_lock_records", return_value=pickings[:1]
+        ):
+            with self.assertRaisesRegex(RetryableJobError, pickings[1].name):
+                shipment.with_context(job_uuid="test")._validate_picking(pickings)
+            with self.assertRaisesRegex(UserError, pickings[1].name):
+                shipment._validate_picking(pickings)
+
+    def test_shipment_advice_error_retry_failed(self):
+        """Retrying the failed transfers only re-enqueues them."""
+        picking = self.test_shipment_advice_error()
+        picking.move_line_ids.result_package_id = False
+        with trap_jobs() as trap:
+            self.shipment_advice_out.action_retry_failed()
+            self.assertEqual(self.shipment_advice_out.state, "in_process")
+            trap.assert_jobs_count(3)  # 1 picking + 1 for unplan + 1 for postprocess
+            jobs = trap.enqueued_jobs
+            picking_jobs = self._filter_jobs(jobs, "_validate_picking")
+            self.assertEqual(picking_jobs[0].args[0], picking)
+            self._asset_jobs_dependency(jobs)
+            trap.perform_enqueued_jobs()
+        self.assertEqual(self.shipment_advice_out.state, "done")
+        self.assertEqual(picking.state, "done")
+        self.assertEqual(
+            self.shipment_advice_out.validation_result_ids.mapped("state"),
+            ["done", "done", "done"],
+        )
+
+    def test_shipment_advice_retry_failed_nothing_failed(self):
+        """Retrying a shipment without failed transfers enqueues nothing."""
+        shipment = self.shipment_advice_out
+        self._in_progress_shipment_advice(shipment)
+        # In error because of the locking of its transfers for instance
+        shipment.state = "error"
+        with trap_jobs() as trap:
+            with self.assertRaisesRegex(UserError, "no failed transfer"):
+                shipment.action_retry_failed()
+            trap.assert_jobs_count(0)
+
+    def test_shipment_advice_plan_load_in_background(self):
+        company = self.env.user.company_id
+        company.shipment_advice_wizards_in_queue_job = True
+        company.shipment_advice_wizard_chunk_size = 1
+        shipment = self.shipment_advice_out
+        picking = self.move_product_out1.picking_id
+        with trap_jobs() as trap:
+            self._plan_records_in_shipment(shipment, picking.move_ids)
+            # One job per move, then the notification
+            trap.assert_jobs_count(3, only=shipment._background_plan)
+            trap.assert_jobs_count(1, only=shipment._background_notify)
+            self.assertEqual(shipment.background_operation, "plan")
+            self.assertEqual(shipment.background_record_count, 3)
+            self.assertFalse(shipment.planned_move_ids)
+            trap.perform_enqueued_jobs()
+        self.assertEqual(shipment.planned_move_ids, picking.move_ids)
+        self.assertFalse(shipment.background_operation)
+        self.assertEqual(shipment.background_done_count, 3)
+        self._in_progress_shipment_advice(shipment)
+        with trap_jobs() as trap:
+            self._load_records_in_shipment(shipment, picking.move_line_ids)
+            # The lines of a transfer are loaded together
+            trap.assert_jobs_count(1, only=shipment._background_load)
+            trap.perform_enqueued_jobs()
+        self.assertEqual(shipment.loaded_move_line_ids, picking.move_line_ids)
+        with trap_jobs() as trap:
+            self._unload_records_from_shipment(shipment, picking)
+            trap.assert_jobs_count(1, only=shipment._background_unload)
+            trap.perform_enqueued_jobs()
+        self.assertFalse(shipment.loaded_move_line_ids)
+
+    def test_shipment_advice_wizard_chunk_size_positive(self):
+        company = self.env.user.company_id
+        for chunk_size in (0, -1):
+            with self.assertRaises(ValidationError):
+                company.shipment_advice_wizard_chunk_size = chunk_size
+
+    def test_shipment_advice_load_in_background_checked(self):
+        """The whole selection is checked before enqueuing the jobs."""
+        shipment = self.shipment_advice_out
+        other_shipment = self.env["shipment.advice"].create(
+            {"shipment_type": "outgoing"}
+        )
+        self.move_product_out1._plan_in_shipment(other_shipment)
+        self._in_progress_shipment_advice(shipment)
+        move_lines = self.move_product_out1.picking_id.move_line_ids
+        with trap_jobs() as trap:
+            with self.assertRaisesRegex(UserError, "planned to be loaded in"):
+                shipment._run_in_background("load", "_background_load", [move_lines])
+            trap.assert_jobs_count(0)
+        self.assertFalse(shipment.background_operation)
+
+    def test_shipment_advice_plan_in_background_failure(self):
+        """A failing chunk stops the operation and reports the error."""
+        company = self.env.user.company_id
+        company.shipment_advice_wizards_in_queue_job = True
+        company.shipment_advice_wizard_chunk_size = 1
+        shipment = self.shipment_advice_out
+        picking = self.move_product_out1.picking_id
+        move_model = type(self.env["stock.move"])
+        with trap_jobs() as trap:
+            self._plan_records_in_shipment(shipment, picking.move_ids)
+            trap.assert_jobs_count(3, only=shipment._background_plan)
+            with mock.patch.object(
+                move_model, "_plan_in_shipment", side_effect=UserError("Boom")
+            ) as plan_in_shipment:
+                trap.perform_enqueued_jobs()
+            # The following chunks are skipped
+            self.assertEqual(plan_in_shipment.call_count, 1)
+        self.assertFalse(shipment.background_operation)
+        self.assertEqual(shipment.background_done_count, 0)
+        self.assertEqual(shipment.background_error, "Boom")
+        self.assertFalse(shipment.planned_move_ids)
@@ -0,0 +1,224 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import threading
+
+from psycopg2.errors import SerializationFailure
+
+import odoo
+from odoo import SUPERUSER_ID, api, fields
+from odoo.exceptions import UserError
+from odoo.tests.common import BaseCase, get_db_name, tagged
+
+from odoo.addons.queue_job.exception import RetryableJobError
+from odoo.addons.queue_job.job import Job
+
+OPERATORS = 4
+
+
+@tagged("post_install", "-at_install")
+class TestShipmentAdviceConcurrency(BaseCase):
+    """Process the same shipment from parallel transactions.
+
+    The data are committed so that each operator works in its own
+    transaction, they are removed at the end of the test. The test runs
+    once all the modules are installed, as it uses the registry from other
+    threads.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.registry = odoo.registry(get_db_name())
+        cls.addClassCleanup(cls._cleanup_data)
+        cls.product_ids = []
+        cls.package_ids = []
+        cls.picking_ids = []
+        cls.shipment_id = None
+        with cls.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {"tracking_disable": True})
+            picking_type = env.ref("stock.picking_type_out")
+            location_src = picking_type.default_location_src_id
+            location_dest = env.ref("stock.stock_location_customers")
+            product = env["product.product"].create(
+                {"name": "Concurrent loading", "type": "consu"}
+            )
+            packaged_products = env["product.product"].create(
+                [
+                    {"name": f"Concurrent loading {index}", "type": "product"}
+                    for index in range(OPERATORS)
+                ]
+            )
+            cls.product_ids = (product | packaged_products).ids
+            # One package of each product
+            packages = env["stock.quant.package"].create(
+                [{"name": f"CONCURRENT_{index}"} for index in range(OPERATORS)]
+            )
+            cls.package_ids = packages.ids
+            for packaged_product, package in zip(packaged_products, packages):
+                env["stock.quant"]._update_available_quantity(
+                    packaged_product, location_src, 1, package_id=package
+                )
+            # One transfer per operator, then one transfer with one package
+            # per operator
+            pickings = env["stock.picking"]
+            for picking_products in [product] * OPERATORS + [packaged_products]:
+                picking = env["stock.picking"].create(
+                    {
+                        "picking_type_id": picking_type.id,
+                        "location_id": location_src.id,
+                        "location_dest_id": location_dest.id,
+                        "move_ids": [
+                            (
+                                0,
+                                0,
+                                {
+                                    "name": move_product.name,
+                                    "product_id": move_product.id,
+                                    "product_uom_qty": 1,
+                                    "product_uom": move_product.uom_id.id,
+                                    "location_id": location_src.id,
+                                    "location_dest_id": location_dest.id,
+                                },
+                            )
+                            for move_product in picking_products
+                        ],
+                    }
+                )
+                picking.action_confirm()
+                pickings |= picking
+            cls.picking_ids = pickings.ids
+            shipment = env["shipment.advice"].create(
+                {
+                    "shipment_type": "outgoing",
+                    "arrival_date": fields.Datetime.now(),
+                    "dock_id": env.ref("shipment_advice.stock_dock_demo").id,
+                }
+            )
+            shipment.action_confirm()
+            cls.shipment_id = shipment.id
+
+    @classmethod
+    def _cleanup_data(cls):
+        with cls.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {"tracking_disable": True})
+            pickings = env["stock.picking"].browse(cls.picking_ids).exists()
+            pickings.move_line_ids.shipment_advice_id = False
+            pickings.action_cancel()
+            pickings.unlink()
+            cls._get_progress_jobs(env).unlink()
+            if cls.shipment_id:
+                # The loading journal is deleted in cascade
+                env["shipment.advice"].browse(cls.shipment_id).unlink()
+            products = env["product.product"].browse(cls.product_ids)
+            env["stock.quant"].search([("product_id", "in", products.ids)]).unlink()
+            env["stock.quant.package"].browse(cls.package_ids).unlink()
+            products.unlink()
+
+    @classmethod
+    def _get_progress_jobs(cls, env):
+        """Return the jobs updating the loading progress of the test transfers."""
+        jobs = env["queue.job"].search(
+            [
+                ("model_name", "=", "stock.picking"),
+                ("method_name", "=", "_update_shipment_loaded_progress"),
+            ]
+        )
+        return jobs.filtered(lambda job: set(job.record_ids) & set(cls.picking_ids))
+
+    def _assign(self, picking_ids):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {"tracking_disable": True})
+            env["stock.picking"].browse(picking_ids).action_assign()
+
+    def _load(self, model, record_id, barrier, errors):
+        try:
+            with self.registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {"tracking_disable": True})
+                barrier.wait(timeout=30)
+                shipment = env["shipment.advice"].browse(self.shipment_id)
+                shipment._ensure_in_progress()
+                env[model].browse(record_id)._load_in_shipment(shipment)
+                env.flush_all()
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    def _load_concurrently(self, model, record_ids):
+        barrier = threading.Barrier(len(record_ids))
+        errors = []
+        threads = [
+            threading.Thread(
+                target=self._load, args=(model, record_id, barrier, errors)
+            )
+            for record_id in record_ids
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        # The loads are not retried: none of them conflicts with another one
+        self.assertFalse(
+            [error for error in errors if isinstance(error, SerializationFailure)]
+        )
+        self.assertFalse(errors)
+
+    def test_shipment_advice_load_concurrently(self):
+        """Operators loading different transfers do not conflict."""
+        picking_ids = self.picking_ids[:OPERATORS]
+        self._assign(picking_ids)
+        self._load_concurrently("stock.picking", picking_ids)
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            shipment = env["shipment.advice"].browse(self.shipment_id)
+            self.assertEqual(shipment.state, "in_progress")
+            loaded_picking_ids = set(shipment.loaded_picking_ids.ids)
+            self.assertEqual(loaded_picking_ids, set(picking_ids))
+
+    def test_shipment_advice_load_same_picking_concurrently(self):
+        """Operators loading different packages of the same transfer.
+
+        The loads do not write the transfer, its loading progress is updated
+        afterwards by a job.
+        """
+        picking_id = self.picking_ids[OPERATORS]
+        self._assign([picking_id])
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            picking = env["stock.picking"].browse(picking_id)
+            package_level_ids = picking.package_level_ids.ids
+            self.assertEqual(len(package_level_ids), OPERATORS)
+        self._load_concurrently("stock.package_level", package_level_ids)
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            picking = env["stock.picking"].browse(picking_id)
+            self.assertTrue(picking.is_fully_loaded_in_shipment)
+            jobs = self._get_progress_jobs(env)
+            self.assertTrue(jobs)
+            for job in jobs:
+                Job.load(env, job.uuid).perform()
+            env.flush_all()
+            self.assertEqual(picking.loaded_packages_count, OPERATORS)
+            self.assertEqual(picking.loaded_progress_f, 1.0)
+
+    def test_shipment_advice_lock_pickings_locked_elsewhere(self):
+        """Transfers locked by another transaction postpone their validation."""
+        picking_ids = self.picking_ids[:2]
+        with self.registry.cursor() as locking_cr:
+            locking_cr.execute(
+                "SELECT id FROM stock_picking WHERE id = %s FOR UPDATE",
+                (picking_ids[0],),
+            )
+            with self.registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                shipment = env["shipment.advice"].browse(self.shipment_id)
+                pickings = env["stock.picking"].browse(picking_ids)
+                for lock_mode in ("nowait", "skip_locked"):
+                    shipment.company_id.shipment_advice_lock_mode = lock_mode
+                    with self.assertRaisesRegex(RetryableJobError, pickings[0].name):
+                        shipment.with_context(
+                            job_uuid="test"
+                        )._lock_pickings_to_validate(pickings)
+                    with self.assertRaisesRegex(UserError, pickings[0].name):
+                        shipment._lock_pickings_to_validate(pickings)
+                # Keep the lock mode of the company
+                cr.rollback()
@@ -150,6 +150,35 @@ class TestShipmentAdviceLoad(Common):
                 package_level,
             )
 
+    def test_shipment_advice_load_errors_collected(self):
+        self._plan_records_in_shipment(self.shipment_advice_out, self.move_product_out1)
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        moves = self.move_product_out2 | self.move_product_out3
+        with self.assertRaises(UserError) as exc:
+            moves.move_line_ids._load_in_shipment(self.shipment_advice_out)
+        message = exc.exception.args[0]
+        self.assertEqual(message.count("planned already"), 2)
+        for product in moves.product_id:
+            self.assertIn(product.display_name, message)
+        self.assertFalse(moves.move_line_ids.shipment_advice_id)
+
+    def test_shipment_advice_load_bulk(self):
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        lines = self.move_product_out1.picking_id.move_line_ids
+        lines._load_in_shipment(self.shipment_advice_out)
+        self.assertEqual(lines.shipment_advice_id, self.shipment_advice_out)
+        for line in lines:
+            self.assertEqual(line.qty_done, line.reserved_uom_qty)
+
+    def test_shipment_advice_load_incomplete_package(self):
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        lines = self.move_product_out2.move_line_ids
+        package_level = lines.package_level_id
+        self.assertEqual(lines._get_incomplete_package_levels(), package_level)
+        self.assertFalse(package_level.move_line_ids._get_incomplete_package_levels())
+        with self.assertRaisesRegex(UserError, self.package.name):
+            lines._load_in_shipment(self.shipment_advice_out)
+
     def test_load_check_package(self):
         """load should ignore done and cancelled lines"""
         move1lines = self.move_product_out1.move_line_ids
@@ -158,3 +187,117 @@ class TestShipmentAdviceLoad(Common):
         picking._put_in_pack(move1lines | move2lines)
         self.move_product_out2._action_done()
         move1lines._load_in_shipment(self.shipment_advice_out)
+
+    def test_shipment_advice_count_multi(self):
+        """Counters are computed for several shipments at once."""
+        picking = self.move_product_out1.picking_id
+        self._plan_records_in_shipment(self.shipment_advice_out, picking)
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        self._load_records_in_shipment(self.shipment_advice_out, picking)
+        self._plan_records_in_shipment(
+            self.shipment_advice_in, self.move_product_in1.picking_id
+        )
+        shipments = self.shipment_advice_out | self.shipment_advice_in
+        shipments.invalidate_recordset()
+        counts = shipments._get_content_counts()
+        self.assertDictEqual(
+            counts[self.shipment_advice_out.id],
+            {
+                "planned_pickings_count": 1,
+                "planned_moves_count": 3,
+                "loaded_pickings_count": 1,
+                "loaded_move_lines_without_package_count": 1,
+                "loaded_packages_count": 1,
+            },
+        )
+        self.assertEqual(self.shipment_advice_in.planned_pickings_count, 1)
+        self.assertEqual(self.shipment_advice_in.planned_moves_count, 2)
+        self.assertEqual(self.shipment_advice_in.loaded_pickings_count, 0)
+
+    def test_shipment_advice_load_totals(self):
+        picking = self.move_product_out1.picking_id
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        self._load_records_in_shipment(self.shipment_advice_out, picking)
+        self.package.shipping_weight = 10.0
+        self.product_out1.weight = 0.5
+        self.product_out1.volume = 0.1
+        self.product_out2.volume = 0.2
+        self.product_out3.volume = 0.3
+        shipment = self.shipment_advice_out
+        shipment.invalidate_recordset(["total_load", "total_bulk_load", "total_volume"])
+        self.assertEqual(shipment.total_load, 10.0)
+        # 20 units of product_out1 without package
+        self.assertAlmostEqual(shipment.total_bulk_load, 10.0)
+        # 20 * 0.1 + 10 * 0.2 + 10 * 0.3
+        self.assertAlmostEqual(shipment.total_volume, 7.0)
+
+    def test_shipment_advice_domain_open_deliveries_in_progress(self):
+        picking = self.move_product_out1.picking_id
+        other_shipment = self.env["shipment.advice"].create(
+            {"shipment_type": "outgoing"}
+        )
+        picking_model = self.env["stock.picking"]
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        self._load_records_in_shipment(
+            self.shipment_advice_out, self.move_product_out1.move_line_ids
+        )
+        # Partially loaded: eligible for both shipments
+        domains = {
+            shipment: shipment._domain_open_deliveries_in_progress()
+            for shipment in (self.shipment_advice_out, other_shipment)
+        }
+        for domain in domains.values():
+            self.assertIn(picking, picking_model.search(domain))
+        # Fully loaded: only eligible for its shipment, the domains being
+        # evaluated again on each search
+        self._load_records_in_shipment(
+            self.shipment_advice_out,
+            self.move_product_out2.move_line_ids.package_level_id,
+        )
+        pickings = picking_model.search(domains[self.shipment_advice_out])
+        self.assertIn(picking, pickings)
+        pickings = picking_model.search(domains[other_shipment])
+        self.assertNotIn(picking, pickings)
+
+    def test_shipment_advice_search_loaded_in_shipment(self):
+        picking = self.move_product_out1.picking_id
+        picking_model = self.env["stock.picking"]
+        domain = [("id", "=", picking.id)]
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        self.assertFalse(
+            picking_model.search(
+                domain + [("is_partially_loaded_in_shipment", "=", True)]
+            )
+        )
+        self.assertEqual(
+            picking_model.search(
+                domain + [("is_fully_loaded_in_shipment", "=", False)]
+            ),
+            picking,
+        )
+        self._load_records_in_shipment(
+            self.shipment_advice_out, self.move_product_out1.move_line_ids
+        )
+        self.assertTrue(picking.is_partially_loaded_in_shipment)
+        self.assertEqual(
+            picking_model.search(
+                domain + [("is_partially_loaded_in_shipment", "=", True)]
+            ),
+            picking,
+        )
+        self.assertEqual(picking.loaded_shipment_advice_ids, self.shipment_advice_out)
+        self._load_records_in_shipment(
+            self.shipment_advice_out,
+            self.move_product_out2.move_line_ids.package_level_id,
+        )
+        self.assertTrue(picking.is_fully_loaded_in_shipment)
+        self.assertFalse(picking.is_partially_loaded_in_shipment)
+        self.assertEqual(
+            picking_model.search(domain + [("is_fully_loaded_in_shipment", "=", True)]),
+            picking,
+        )
+        self.assertFalse(
+            picking_model.search(
+                domain + [("is_partially_loaded_in_shipment", "!=", False)]
+            )
+        )
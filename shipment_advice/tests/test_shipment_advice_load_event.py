@@ -0,0 +1,47 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+from odoo.exceptions import UserError
+
+from .common import Common
+
+
+class TestShipmentAdviceLoadEvent(Common):
+    def test_shipment_advice_load_events(self):
+        shipment = self.shipment_advice_out
+        event_model = self.env["shipment.advice.load.event"]
+        self._in_progress_shipment_advice(shipment)
+        package_level = self.move_product_out2.move_line_ids.package_level_id
+        self._load_records_in_shipment(shipment, package_level)
+        self._load_records_in_shipment(shipment, self.move_product_out1.move_line_ids)
+        events = shipment.load_event_ids
+        self.assertEqual(len(events), 3)
+        self.assertEqual(set(events.mapped("event_type")), {"load"})
+        self.assertEqual(events.dock_id, self.dock)
+        self.assertEqual(events.user_id, self.env.user)
+        self.assertEqual(sum(events.mapped("quantity")), 40)
+        progress = event_model._get_loading_progress(shipment.ids)[shipment.id]
+        self.assertEqual(progress, {"quantity": 40, "move_lines": 1, "packages": 1})
+        rates = event_model._get_loading_rates(dock_ids=self.dock.ids)
+        self.assertEqual(len(rates), 1)
+        self.assertEqual(rates[0]["dock_id"], self.dock.id)
+        self.assertEqual(rates[0]["quantity"], 40)
+        self.assertEqual(rates[0]["count"], 3)
+        # Unloading is journaled with negative quantities
+        self._unload_records_from_shipment(shipment, package_level.move_line_ids)
+        unload_events = shipment.load_event_ids - events
+        self.assertEqual(set(unload_events.mapped("event_type")), {"unload"})
+        self.assertEqual(sum(unload_events.mapped("quantity")), -20)
+        progress = event_model._get_loading_progress(shipment.ids)[shipment.id]
+        self.assertEqual(progress, {"quantity": 20, "move_lines": 1, "packages": 0})
+
+    def test_shipment_advice_load_events_append_only(self):
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        self._load_records_in_shipment(
+            self.shipment_advice_out, self.move_product_out1.move_line_ids
+        )
+        event = self.shipment_advice_out.load_event_ids
+        with self.assertRaises(UserError):
+            event.quantity = 0
+        with self.assertRaises(UserError):
+            event.unlink()
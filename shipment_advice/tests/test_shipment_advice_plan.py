@@ -30,3 +30,56 @@ class TestShipmentAdvicePlan(Common):
             wiz.shipment_advice_id.planned_move_ids, self.move_product_out1
         )
         self.assertEqual(wiz.shipment_advice_id.planned_moves_count, 1)
+
+    def test_shipment_advice_unplan_wizard_eligibility(self):
+        picking_out = self.move_product_out1.picking_id
+        picking_in = self.move_product_in1.picking_id
+        self._plan_records_in_shipment(self.shipment_advice_out, picking_out)
+        self._plan_records_in_shipment(self.shipment_advice_in, picking_in)
+        self._in_progress_shipment_advice(self.shipment_advice_in)
+        pickings = picking_out | picking_in
+        wiz = (
+            self.env["wizard.unplan.shipment"]
+            .with_context(active_model=pickings._name, active_ids=pickings.ids)
+            .create({})
+        )
+        self.assertEqual(wiz.picking_ids, picking_out)
+        self.assertTrue(wiz.warning)
+
+    def test_shipment_advice_plan_move_partial_package(self):
+        # Moves 2 and 3 are in the same package, which has to be planned whole
+        moves = self.move_product_out2 | self.move_product_out3
+        self.assertEqual(
+            self.move_product_out2._get_moves_in_partial_packages(),
+            self.move_product_out2,
+        )
+        self.assertFalse(moves._get_moves_in_partial_packages())
+        wiz = self._plan_records_in_shipment(
+            self.shipment_advice_out, self.move_product_out1 | self.move_product_out2
+        )
+        self.assertEqual(wiz.move_ids, self.move_product_out1)
+        self.assertTrue(wiz.warning)
+        wiz = self._plan_records_in_shipment(self.shipment_advice_out, moves)
+        self.assertEqual(wiz.move_ids, moves)
+
+    def test_shipment_advice_unplan_move_partial_package(self):
+        # Moves 2 and 3 are in the same package, which has to be unplanned whole
+        moves = self.move_product_out2 | self.move_product_out3
+        self._plan_records_in_shipment(
+            self.shipment_advice_out, self.move_product_out1 | moves
+        )
+        wiz_model = self.env["wizard.unplan.shipment"]
+        records = self.move_product_out1 | self.move_product_out2
+        wiz = wiz_model.with_context(
+            active_model=records._name, active_ids=records.ids
+        ).create({})
+        self.assertEqual(wiz.move_ids, self.move_product_out1)
+        self.assertTrue(wiz.warning)
+        wiz = wiz_model.with_context(
+            active_model=moves._name, active_ids=moves.ids
+        ).create({})
+        self.assertEqual(wiz.move_ids, moves)
+        wiz.action_unplan()
+        self.assertEqual(
+            self.shipment_advice_out.planned_move_ids, self.move_product_out1
+        )
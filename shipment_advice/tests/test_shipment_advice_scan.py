@@ -0,0 +1,166 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import logging
+import statistics
+import time
+from unittest import mock
+
+from odoo.exceptions import UserError
+
+from .common import Common
+
+_logger = logging.getLogger(__name__)
+
+# Latency budget of a scan (see readme/USAGE.rst): SQL queries of a scan
+# (building the barcode index of the shipment included), checked by the tests,
+# and median duration of the scans of a loading session in seconds, only
+# reported by the benchmark as it depends on the machine running the tests
+SCAN_QUERY_BUDGET = 50
+SCAN_TIME_BUDGET = 0.1
+SCAN_BENCHMARK_PACKAGES = 20
+
+
+class TestShipmentAdviceScan(Common):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.product_out1.barcode = "SCAN_OUT1"
+        cls.shipment_advice_out.dock_id = cls.dock
+
+    def test_shipment_advice_scan_package(self):
+        self._confirm_shipment_advice(self.shipment_advice_out)
+        progress = self.shipment_advice_out._scan_barcode(self.package.name)
+        self.assertEqual(self.shipment_advice_out.state, "in_progress")
+        self.assertEqual(progress["state"], "in_progress")
+        self.assertEqual(progress["loaded_packages_count"], 1)
+        self.assertEqual(progress["loaded_move_lines_without_package_count"], 0)
+        package_level = self.move_product_out2.move_line_ids.package_level_id
+        self.assertEqual(package_level.shipment_advice_id, self.shipment_advice_out)
+        # Nothing left to load for this package
+        with self.assertRaisesRegex(UserError, "Nothing to load"):
+            self.shipment_advice_out._scan_barcode(self.package.name)
+        progress = self.shipment_advice_out._scan_barcode(
+            self.package.name, unload=True
+        )
+        self.assertEqual(progress["loaded_packages_count"], 0)
+        self.assertFalse(package_level.shipment_advice_id)
+
+    def test_shipment_advice_scan_product(self):
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        progress = self.shipment_advice_out._scan_barcode("SCAN_OUT1")
+        self.assertEqual(progress["loaded_pickings_count"], 1)
+        self.assertEqual(progress["loaded_move_lines_without_package_count"], 1)
+        self.assertEqual(
+            self.move_product_out1.move_line_ids.shipment_advice_id,
+            self.shipment_advice_out,
+        )
+        with self.assertRaisesRegex(UserError, "Nothing to load"):
+            self.shipment_advice_out._scan_barcode("UNKNOWN")
+
+    def test_shipment_advice_scan_not_started(self):
+        with self.assertRaisesRegex(UserError, "not being loaded"):
+            self.shipment_advice_out._scan_barcode(self.package.name)
+
+    def test_shipment_advice_scan_query_budget(self):
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with self.assertQueryCount(SCAN_QUERY_BUDGET):
+            self.shipment_advice_out._scan_barcode(self.package.name)
+            self.env.flush_all()
+
+    def test_shipment_advice_scan_benchmark(self):
+        """Load a truck package by package, as an operator at the dock."""
+        location = self.picking_type_out.default_location_src_id
+        group = self.env["procurement.group"].create({})
+        packages = self.env["stock.quant.package"].create(
+            [
+                {"name": f"SCAN_BENCH_{index}"}
+                for index in range(SCAN_BENCHMARK_PACKAGES)
+            ]
+        )
+        product = self.env["product.product"].create(
+            {"name": "Scan benchmark", "type": "product"}
+        )
+        for package in packages:
+            self._update_qty_in_location(location, product, 1, package=package)
+        self._create_move(
+            self.picking_type_out, product, SCAN_BENCHMARK_PACKAGES, group
+        )
+        shipment = self.shipment_advice_out
+        self._in_progress_shipment_advice(shipment)
+        self.env.flush_all()
+        durations = []
+        for package in packages:
+            start = time.perf_counter()
+            shipment._scan_barcode(package.name)
+            self.env.flush_all()
+            durations.append(time.perf_counter() - start)
+        self.assertEqual(shipment.loaded_packages_count, SCAN_BENCHMARK_PACKAGES)
+        median = statistics.median(durations)
+        _logger.info(
+            "Scan benchmark: %s scans, median %.1f ms, max %.1f ms",
+            len(durations),
+            median * 1000,
+            max(durations) * 1000,
+        )
+        if median > SCAN_TIME_BUDGET:
+            _logger.warning(
+                "Scan benchmark: median over the budget of %.1f ms",
+                SCAN_TIME_BUDGET * 1000,
+            )
+
+    def test_shipment_advice_scan_index(self):
+        shipment = self.shipment_advice_out
+        self._in_progress_shipment_advice(shipment)
+        shipment_model = type(self.env["shipment.advice"])
+        with mock.patch.object(
+            shipment_model,
+            "_scan_build_index",
+            autospec=True,
+            side_effect=shipment_model._scan_build_index,
+        ) as build_index:
+            shipment._scan_invalidate_index()
+            planned_shipment_id, index = shipment._scan_get_index()
+            self.assertFalse(planned_shipment_id)
+            package_level = self.move_product_out2.move_line_ids.package_level_id
+            self.assertEqual(index[self.package.name], (tuple(package_level.ids), ()))
+            move_lines = self.move_product_out1.move_line_ids
+            self.assertEqual(index["SCAN_OUT1"], ((), tuple(move_lines.ids)))
+            # Repeated scans reuse the index, without searching the transfers
+            with mock.patch.object(
+                shipment_model,
+                "_domain_open_deliveries_in_progress",
+                autospec=True,
+                side_effect=shipment_model._domain_open_deliveries_in_progress,
+            ) as domain_open_deliveries:
+                self.assertEqual(
+                    shipment._scan_resolve_barcode("SCAN_OUT1"), move_lines
+                )
+                self.assertEqual(domain_open_deliveries.call_count, 0)
+            self.assertEqual(shipment._scan_get_index()[1], index)
+            self.assertEqual(build_index.call_count, 1)
+            # Loading keeps the index, loaded candidates being skipped
+            shipment._scan_barcode(self.package.name)
+            with self.assertRaisesRegex(UserError, "Nothing to load"):
+                shipment._scan_barcode(self.package.name)
+            self.assertEqual(build_index.call_count, 1)
+            # Unloading drops the index of all shipments
+            shipment._scan_barcode(self.package.name, unload=True)
+            shipment._scan_get_index()
+            self.assertEqual(build_index.call_count, 2)
+
+    def test_shipment_advice_scan_index_stale(self):
+        shipment = self.shipment_advice_out
+        self._in_progress_shipment_advice(shipment)
+        shipment._scan_get_index()
+        # Planned in another shipment after the index was built
+        other_shipment = self.env["shipment.advice"].create(
+            {"shipment_type": "outgoing"}
+        )
+        self.move_product_out1._plan_in_shipment(other_shipment)
+        self.assertIn("SCAN_OUT1", shipment._scan_get_index()[1])
+        self.assertFalse(shipment._scan_resolve_barcode_from_index("SCAN_OUT1"))
+        with self.assertRaisesRegex(UserError, "Nothing to load"):
+            shipment._scan_barcode("SCAN_OUT1")
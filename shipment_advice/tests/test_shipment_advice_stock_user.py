@@ -1,6 +1,8 @@
 # Copyright 2021 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
+from odoo.exceptions import AccessError
+
 from .common import Common
 
 
@@ -92,3 +94,15 @@ class TestShipmentAdviceStockUser(Common):
             user=self.stock_user,
         )
         self.assertFalse(wiz.picking_ids)
+
+    def test_shipment_advice_validation_results_read_only(self):
+        shipment_advice = self.shipment_advice_out
+        picking = self.move_product_out1.picking_id
+        self._in_progress_shipment_advice(shipment_advice)
+        self._load_records_in_shipment(shipment_advice, picking)
+        shipment_advice.with_user(self.stock_user).action_done()
+        result = shipment_advice.validation_result_ids.with_user(self.stock_user)
+        self.assertEqual(result.picking_id, picking)
+        self.assertEqual(result.state, "done")
+        with self.assertRaises(AccessError):
+            result.write({"state": "error"})
@@ -54,3 +54,16 @@ class TestShipmentAdviceUnload(Common):
         self.assertFalse(self.move_product_out2.move_line_ids.qty_done)
         self.assertFalse(self.move_product_out3.move_line_ids.qty_done)
         self.assertFalse(self.shipment_advice_out.loaded_package_ids)
+
+    def test_shipment_advice_unload_wizard_eligibility(self):
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        picking = self.move_product_out1.picking_id
+        self._load_records_in_shipment(self.shipment_advice_out, picking)
+        pickings = picking | self.move_product_in1.picking_id
+        wiz = (
+            self.env["wizard.unload.shipment"]
+            .with_context(active_model=pickings._name, active_ids=pickings.ids)
+            .create({})
+        )
+        self.assertEqual(wiz.picking_ids, picking)
+        self.assertTrue(wiz.warning)
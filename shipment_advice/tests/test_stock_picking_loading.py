@@ -0,0 +1,37 @@
+# Copyright 2021 Camptocamp SA
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+from odoo.addons.queue_job.tests.common import trap_jobs
+
+from .common import Common
+
+
+class TestStockPickingLoading(Common):
+    def test_shipment_advice_loading_progress_stored(self):
+        """Loading progress is maintained when loading and unloading."""
+        picking = self.move_product_out1.picking_id
+        picking_model = self.env["stock.picking"]
+        self.assertEqual(picking.total_packages_count, 1)
+        self.assertEqual(picking.total_move_lines_count, 1)
+        self.assertEqual(picking.loaded_packages_count, 0)
+        self._in_progress_shipment_advice(self.shipment_advice_out)
+        package_level = self.move_product_out2.move_line_ids.package_level_id
+        with trap_jobs() as trap:
+            self._load_records_in_shipment(self.shipment_advice_out, package_level)
+            # The transfer is not written by the loading itself
+            self.assertEqual(picking.loaded_packages_count, 0)
+            trap.perform_enqueued_jobs()
+        self.assertEqual(picking.loaded_packages_count, 1)
+        self.assertEqual(picking.loaded_packages_progress, "1 / 1")
+        self.assertEqual(picking.loaded_move_lines_count, 0)
+        self.assertEqual(
+            picking_model.search(
+                [("id", "=", picking.id), ("loaded_packages_progress_f", "=", 1.0)]
+            ),
+            picking,
+        )
+        with trap_jobs() as trap:
+            package_level._unload_from_shipment()
+            trap.perform_enqueued_jobs()
+        self.assertEqual(picking.loaded_packages_count, 0)
+        self.assertEqual(picking.loaded_packages_progress, "0 / 1")
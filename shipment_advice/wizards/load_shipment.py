@@ -50,8 +50,12 @@ class WizardLoadInShipment(models.TransientModel):
     def _default_get_from_stock_picking(self, res, ids):
         pickings = self.env["stock.picking"].browse(ids)
         # We keep only deliveries and receptions not canceled/done
-        pickings_to_keep = pickings.filtered_domain(
-            [("state", "=", "assigned"), ("picking_type_id.code", "=", "outgoing")]
+        pickings_to_keep = pickings.search(
+            [
+                ("id", "in", ids),
+                ("state", "=", "assigned"),
+                ("picking_type_id.code", "=", "outgoing"),
+            ]
         )
         res["picking_ids"] = [(6, False, pickings_to_keep.ids)]
         if not pickings_to_keep:
@@ -64,28 +68,39 @@ class WizardLoadInShipment(models.TransientModel):
                 "Transfers to include have been updated, keeping only those "
                 "assigned and qualified as delivery."
             )
-        # Prefill the shipment if any (we take the first one)
-        res["shipment_advice_id"] = fields.first(
-            pickings_to_keep.move_ids.shipment_advice_id
-        ).id
         # Prefill the shipment with the planned one if any (we take the first one)
-        res["shipment_advice_id"] = fields.first(
-            pickings_to_keep.move_ids.shipment_advice_id
+        res["shipment_advice_id"] = self._get_planned_shipment_advice(
+            [("picking_id", "in", pickings_to_keep.ids)]
         ).id
         return res
 
+    @api.model
+    def _get_planned_shipment_advice(self, move_domain):
+        """Return the first shipment in which the matching moves are planned."""
+        return (
+            self.env["stock.move"]
+            .search(move_domain + [("shipment_advice_id", "!=", False)], limit=1)
+            .shipment_advice_id
+        )
+
     def _default_get_from_stock_move_line(self, res, ids):
         lines = self.env["stock.move.line"].browse(ids)
         # We keep only deliveries not canceled/done
-        if not lines._check_entire_package():
+        incomplete_package_levels = lines._get_incomplete_package_levels()
+        if incomplete_package_levels:
             raise UserError(
                 _(
                     "You cannot load move lines which are part of a package, "
                     "unless you select all the move lines related to this package."
+                    "\n%(info)s",
+                    info=lines._get_incomplete_package_levels_info(
+                        incomplete_package_levels
+                    ),
                 )
             )
-        lines_to_keep = lines.filtered_domain(
+        lines_to_keep = lines.search(
             [
+                ("id", "in", ids),
                 ("state", "in", ("assigned", "partially_available")),
                 ("picking_id.picking_type_id.code", "=", "outgoing"),
             ]
@@ -102,16 +117,17 @@ class WizardLoadInShipment(models.TransientModel):
                 "qualified as delivery."
             )
         # Prefill the shipment with the planned one if any
-        res["shipment_advice_id"] = fields.first(
-            lines_to_keep.move_id.shipment_advice_id
+        res["shipment_advice_id"] = self._get_planned_shipment_advice(
+            [("move_line_ids", "in", lines_to_keep.ids)]
         ).id
         return res
 
     def _default_get_from_stock_package_level(self, res, ids):
         package_levels = self.env["stock.package_level"].browse(ids)
         # We keep only deliveries and receptions not canceled/done
-        package_levels_to_keep = package_levels.filtered_domain(
+        package_levels_to_keep = package_levels.search(
             [
+                ("id", "in", ids),
                 ("state", "not in", ("done", "cancel")),
                 ("picking_type_code", "=", "outgoing"),
             ]
@@ -128,9 +144,13 @@ class WizardLoadInShipment(models.TransientModel):
                 "qualified as delivery."
             )
         # Prefill the shipment with the planned one if any
-        res["shipment_advice_id"] = fields.first(
-            package_levels_to_keep.move_ids.shipment_advice_id
-            or package_levels_to_keep.move_line_ids.move_id.shipment_advice_id
+        res["shipment_advice_id"] = (
+            self._get_planned_shipment_advice(
+                [("package_level_id", "in", package_levels_to_keep.ids)]
+            )
+            or self._get_planned_shipment_advice(
+                [("move_line_ids.package_level_id", "in", package_levels_to_keep.ids)]
+            )
         ).id
         return res
 
@@ -193,13 +213,16 @@ class WizardLoadInShipment(models.TransientModel):
     def action_load(self):
         """Load the selected records in the selected shipment."""
         self.ensure_one()
-        # Load whole transfers / move lines / package levels
-        self.picking_ids._load_in_shipment(self.shipment_advice_id)
-        self.move_line_ids._load_in_shipment(self.shipment_advice_id)
-        self.package_level_ids._load_in_shipment(self.shipment_advice_id)
         # Update the shipment status if needed
-        if self.shipment_advice_id.state == "confirmed":
-            self.shipment_advice_id.action_in_progress()
+        self.shipment_advice_id._ensure_in_progress()
+        # Load whole transfers / move lines / package levels
+        shipment = self.shipment_advice_id
+        records_list = [self.picking_ids, self.move_line_ids, self.package_level_ids]
+        if shipment._use_background_jobs(sum(len(r) for r in records_list)):
+            shipment._run_in_background("load", "_background_load", records_list)
+        else:
+            for records in records_list:
+                records._load_in_shipment(shipment)
         if self.open_shipment:
             view_form = self.env.ref("shipment_advice.shipment_advice_view_form")
             action_xmlid = "shipment_advice.shipment_advice_action"
@@ -45,8 +45,9 @@ class WizardPlanShipment(models.TransientModel):
     def _default_get_from_stock_picking(self, res, ids):
         pickings = self.env["stock.picking"].browse(ids)
         # We keep only deliveries and receptions not canceled/done
-        pickings_to_keep = pickings.filtered_domain(
+        pickings_to_keep = pickings.search(
             [
+                ("id", "in", ids),
                 ("state", "not in", ["cancel", "done"]),
                 ("picking_type_code", "in", ["incoming", "outgoing"]),
             ]
@@ -70,17 +71,11 @@ class WizardPlanShipment(models.TransientModel):
         # We keep only deliveries and receptions not canceled/done
         # and not linked to a package level itself linked to other moves
         # (we want to plan the package as a whole, not a part of it)
-        moves_to_keep = self.env["stock.move"]
-        for move in moves:
-            other_moves = (
-                move.move_line_ids.package_level_id.move_line_ids.move_id
-                + move.package_level_id.move_ids
-            ) - moves
-            if other_moves:
-                continue
-            moves_to_keep |= move
-        moves_to_keep = moves_to_keep.filtered_domain(
+        moves_in_partial_packages = moves._get_moves_in_partial_packages()
+        moves_to_keep = moves.search(
             [
+                ("id", "in", ids),
+                ("id", "not in", moves_in_partial_packages.ids),
                 ("state", "not in", ["cancel", "done"]),
                 ("picking_type_id.code", "in", ["incoming", "outgoing"]),
             ]
@@ -137,8 +132,13 @@ class WizardPlanShipment(models.TransientModel):
     def action_plan(self):
         """Plan the selected records in the selected shipment."""
         self.ensure_one()
-        self.picking_ids._plan_in_shipment(self.shipment_advice_id)
-        self.move_ids._plan_in_shipment(self.shipment_advice_id)
+        shipment = self.shipment_advice_id
+        moves = self.picking_ids.move_ids | self.move_ids
+        if shipment._use_background_jobs(len(moves)):
+            shipment._run_in_background("plan", "_background_plan", [moves])
+        else:
+            self.picking_ids._plan_in_shipment(shipment)
+            self.move_ids._plan_in_shipment(shipment)
         view_form = self.env.ref("shipment_advice.shipment_advice_view_form")
         action_xmlid = "shipment_advice.shipment_advice_action"
         action = self.env["ir.actions.act_window"]._for_xml_id(action_xmlid)
@@ -3,6 +3,7 @@
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.tools import groupby
 
 
 class WizardUnloadShipment(models.TransientModel):
@@ -37,17 +38,25 @@ class WizardUnloadShipment(models.TransientModel):
     @api.model
     def _default_get_from_stock_picking(self, res, ids):
         pickings = self.env["stock.picking"].browse(ids)
-        # We keep only deliveries not canceled/done
-        pickings_to_keep = pickings.filtered(
-            lambda o: (
-                o.state not in ["cancel", "done"]
-                and o.move_line_ids.shipment_advice_id
-                and all(
-                    state in ("in_progress", "error")
-                    for state in o.move_line_ids.shipment_advice_id.mapped("state")
-                )
-                and o.picking_type_code == "outgoing"
-            )
+        # We keep only deliveries not canceled/done,
+        # loaded in shipments which are all in progress
+        shipments_not_in_progress = self.env["shipment.advice"]._search(
+            [("state", "not in", ("in_progress", "error"))]
+        )
+        pickings_with_shipment_not_in_progress = pickings._search(
+            [
+                ("id", "in", ids),
+                ("move_line_ids.shipment_advice_id", "in", shipments_not_in_progress),
+            ]
+        )
+        pickings_to_keep = pickings.search(
+            [
+                ("id", "in", ids),
+                ("state", "not in", ["cancel", "done"]),
+                ("move_line_ids.shipment_advice_id", "!=", False),
+                ("id", "not in", pickings_with_shipment_not_in_progress),
+                ("picking_type_code", "=", "outgoing"),
+            ]
         )
         res["picking_ids"] = [(6, False, pickings_to_keep.ids)]
         if not pickings_to_keep:
@@ -66,16 +75,13 @@ class WizardUnloadShipment(models.TransientModel):
     def _default_get_from_stock_move_line(self, res, ids):
         lines = self.env["stock.move.line"].browse(ids)
         # We keep only deliveries not canceled/done
-        lines_to_keep = lines.filtered(
-            lambda o: (
-                o.state not in ["cancel", "done"]
-                and o.shipment_advice_id
-                and all(
-                    state in ("in_progress", "error")
-                    for state in o.shipment_advice_id.mapped("state")
-                )
-                and o.picking_code == "outgoing"
-            )
+        lines_to_keep = lines.search(
+            [
+                ("id", "in", ids),
+                ("state", "not in", ["cancel", "done"]),
+                ("shipment_advice_id.state", "in", ("in_progress", "error")),
+                ("picking_code", "=", "outgoing"),
+            ]
         )
         res["move_line_ids"] = [(6, False, lines_to_keep.ids)]
         if not lines_to_keep:
@@ -93,6 +99,19 @@ class WizardUnloadShipment(models.TransientModel):
     def action_unload(self):
         """Unload the selected records from their related shipment."""
         self.ensure_one()
+        move_lines = (
+            self.picking_ids.move_line_ids.filtered("shipment_advice_id")
+            | self.move_line_ids
+        )
+        shipments = move_lines.shipment_advice_id
+        if shipments and shipments[0]._use_background_jobs(len(move_lines)):
+            # Unload the lines of each shipment in its own chain of jobs
+            for shipment, lines in groupby(
+                move_lines, key=lambda l: l.shipment_advice_id
+            ):
+                lines = move_lines.browse([line.id for line in lines])
+                shipment._run_in_background("unload", "_background_unload", [lines])
+            return True
         self.picking_ids._unload_from_shipment()
         self.move_line_ids._unload_from_shipment()
         return True
@@ -38,17 +38,25 @@ class WizardUnplanShipment(models.TransientModel):
     @api.model
     def _default_get_from_stock_picking(self, res, ids):
         pickings = self.env["stock.picking"].browse(ids)
-        # We keep only deliveries and receptions not canceled/done
-        pickings_to_keep = pickings.filtered(
-            lambda o: (
-                o.state not in ["cancel", "done"]
-                and o.move_ids.shipment_advice_id
-                and all(
-                    state in ("draft", "confirmed")
-                    for state in o.move_ids.shipment_advice_id.mapped("state")
-                )
-                and o.picking_type_code in ("incoming", "outgoing")
-            )
+        # We keep only deliveries and receptions not canceled/done,
+        # planned in shipments which are all draft or confirmed
+        shipments_started = self.env["shipment.advice"]._search(
+            [("state", "not in", ("draft", "confirmed"))]
+        )
+        pickings_with_shipment_started = pickings._search(
+            [
+                ("id", "in", ids),
+                ("move_ids.shipment_advice_id", "in", shipments_started),
+            ]
+        )
+        pickings_to_keep = pickings.search(
+            [
+                ("id", "in", ids),
+                ("state", "not in", ["cancel", "done"]),
+                ("move_ids.shipment_advice_id", "!=", False),
+                ("id", "not in", pickings_with_shipment_started),
+                ("picking_type_code", "in", ("incoming", "outgoing")),
+            ]
         )
         res["picking_ids"] = [(6, False, pickings_to_keep.ids)]
         if not pickings_to_keep:
@@ -69,19 +77,12 @@ class WizardUnplanShipment(models.TransientModel):
         # We keep only deliveries and receptions not canceled/done
         # and not linked to a package level itself linked to other moves
         # (we want to unplan the package as a whole, not a part of it)
-        moves_to_keep = self.env["stock.move"]
-        for move in moves:
-            other_moves = (
-                move.move_line_ids.package_level_id.move_line_ids.move_id
-                + move.package_level_id.move_ids
-            ) - move
-            if other_moves:
-                continue
-            moves_to_keep |= move
-        moves_to_keep = moves_to_keep.filtered_domain(
+        moves_in_partial_packages = moves._get_moves_in_partial_packages()
+        moves_to_keep = moves.search(
             [
+                ("id", "in", ids),
+                ("id", "not in", moves_in_partial_packages.ids),
                 ("state", "not in", ["cancel", "done"]),
-                ("shipment_advice_id", "!=", False),
                 ("shipment_advice_id.state", "in", ("draft", "confirmed")),
             ]
         )
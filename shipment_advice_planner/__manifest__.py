@@ -10,6 +10,7 @@
     "maintainers": ["jbaudoux"],
     "website": "https://github.com/OCA/stock-logistics-transport",
     "depends": ["shipment_advice"],
+    "external_dependencies": {"python": ["numpy"]},
     "data": [
         "security/shipment_advice_planner.xml",
         "wizards/shipment_advice_planner.xml",
@@ -1,2 +1,5 @@
 from . import test_picking_can_be_planned
 from . import test_shipment_advice_planner
+from . import test_shipment_advice_planner_capacity
+from . import test_shipment_advice_planner_geo
+from . import test_shipment_advice_planner_dock_slots
@@ -1,6 +1,9 @@
 # Copyright 2023 ACSONE SA/NV
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from unittest import mock
+
+from odoo import Command
 from odoo.exceptions import ValidationError
 
 from .common import TestShipmentAdvicePlannerCommon
@@ -72,3 +75,88 @@ class TestShipmentAdvicePlanner(TestShipmentAdvicePlannerCommon):
                     lambda p: not p.can_be_planned_in_shipment_advice
                 )[0]
             )
+
+    def test_partition_pickings_to_plan(self):
+        wizard = self.wizard_form.save()
+        pickings = wizard.picking_to_plan_ids
+        by_picking_type = wizard._get_picking_to_plan_by_picking_type()
+        self.assertEqual(set(by_picking_type), set(pickings.picking_type_id))
+        for picking_type, pickings_to_plan in by_picking_type.items():
+            self.assertEqual(pickings_to_plan.picking_type_id, picking_type)
+        partitions = wizard._partition_pickings_to_plan(
+            ["picking_type_id", "partner_id", lambda p: p.scheduled_date.date()]
+        )
+        planned_pickings = self.env["stock.picking"]
+        for (picking_type, partner, date), pickings_to_plan in partitions.items():
+            self.assertEqual(pickings_to_plan.picking_type_id, picking_type)
+            self.assertEqual(pickings_to_plan.partner_id, partner)
+            dates = {p.scheduled_date.date() for p in pickings_to_plan}
+            self.assertEqual(dates, {date})
+            planned_pickings |= pickings_to_plan
+        self.assertEqual(planned_pickings, pickings)
+
+    def test_plan_pickings_by_picking_type_hook(self):
+        """The pickings to plan are grouped by the picking type hook."""
+        wizard = self.wizard_form.save()
+        picking_type, pickings = next(
+            iter(wizard._get_picking_to_plan_by_picking_type().items())
+        )
+        with mock.patch.object(
+            type(wizard),
+            "_get_picking_to_plan_by_picking_type",
+            return_value={picking_type: pickings[0]},
+        ):
+            plan = wizard._prepare_shipment_plan()
+        self.assertEqual(len(plan), 1)
+        self.assertEqual(set(plan[0]["move_ids"]), set(pickings[0].move_ids.ids))
+
+    def test_pop_planned_move_ids(self):
+        wizard_model = self.env["shipment.advice.planner"]
+        vals = {
+            "planned_move_ids": [
+                Command.set([1, 2]),
+                Command.link(3),
+                Command.unlink(1),
+            ]
+        }
+        self.assertEqual(wizard_model._pop_planned_move_ids(vals), [2, 3])
+        self.assertNotIn("planned_move_ids", vals)
+        with self.assertRaises(NotImplementedError):
+            wizard_model._pop_planned_move_ids(
+                {"planned_move_ids": [Command.create({"name": "New move"})]}
+            )
+
+    def test_shipment_advice_planner_preview(self):
+        shipment_model = self.env["shipment.advice"]
+        shipment_count = shipment_model.search_count([])
+        wizard = self.wizard_form.save()
+        wizard.button_preview_shipments()
+        self.assertTrue(wizard.preview_data)
+        self.assertTrue(wizard.preview_summary)
+        # Nothing is written while previewing
+        self.assertEqual(shipment_model.search_count([]), shipment_count)
+        self.assertFalse(wizard.picking_to_plan_ids.move_ids.shipment_advice_id)
+        summary = wizard._get_shipment_plan_summary(
+            wizard._prepare_shipment_plan()
+        )
+        self.assertEqual(summary["shipment_count"], 2)
+        self.assertEqual(summary["picking_count"], len(wizard.picking_to_plan_ids))
+        self.assertEqual(
+            summary["move_count"], len(wizard.picking_to_plan_ids.move_ids)
+        )
+        # Changing the planning inputs discards the preview
+        wizard.warehouse_id = self.warehouse
+        self.assertFalse(wizard.preview_data)
+        wizard.warehouse_id = False
+        wizard.button_preview_shipments()
+        action = wizard.button_plan_shipments()
+        shipments = self.env[action.get("res_model")].search(action.get("domain"))
+        self.assertEqual(len(shipments), 2)
+        self.assertEqual(
+            shipments.planned_move_ids, wizard.picking_to_plan_ids.move_ids
+        )
+        for shipment in shipments:
+            self.assertEqual(
+                shipment.planned_picking_ids.picking_type_id.warehouse_id,
+                shipment.warehouse_id,
+            )
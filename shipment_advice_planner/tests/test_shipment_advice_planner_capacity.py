@@ -0,0 +1,46 @@
+# Copyright 2023 ACSONE SA/NV
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import numpy as np
+
+from .common import TestShipmentAdvicePlannerCommon
+
+
+class TestShipmentAdvicePlannerCapacity(TestShipmentAdvicePlannerCommon):
+    def test_pack_first_fit_decreasing(self):
+        planner = self.env["shipment.advice.planner"]
+        sizes = np.array([[3, 0, 1], [6, 0, 1], [4, 0, 1], [5, 0, 1], [12, 0, 1]])
+        capacities = np.array([10, np.inf, np.inf])
+        bins = planner._pack_first_fit_decreasing(sizes, capacities)
+        # The oversized item gets its own bin, then 6 + 4 and 5 + 3
+        self.assertEqual(bins.tolist(), [2, 1, 1, 2, 0])
+        capacities = np.array([np.inf, np.inf, 2])
+        bins = planner._pack_first_fit_decreasing(sizes, capacities)
+        self.assertEqual(np.bincount(bins).tolist(), [2, 2, 1])
+
+    def test_shipment_advice_planner_capacity_stops(self):
+        self.wizard_form.shipment_planning_method = "capacity"
+        self.wizard_form.max_stops = 1
+        wizard = self.wizard_form.save()
+        pickings = wizard.picking_to_plan_ids
+        action = wizard.button_plan_shipments()
+        shipments = self.env[action.get("res_model")].search(action.get("domain"))
+        stops = {(p.picking_type_id, p.partner_id) for p in pickings}
+        self.assertEqual(len(shipments), len(stops))
+        self.assertEqual(shipments.planned_move_ids, pickings.move_ids)
+        for shipment in shipments:
+            self.assertEqual(len(shipment.planned_picking_ids.partner_id), 1)
+
+    def test_shipment_advice_planner_capacity_weight(self):
+        self.wizard_form.shipment_planning_method = "capacity"
+        wizard = self.wizard_form.save()
+        pickings = wizard.picking_to_plan_ids
+        loads = wizard._get_picking_loads(pickings)
+        for picking in pickings:
+            self.assertAlmostEqual(
+                loads[picking.id][0], sum(picking.move_ids.mapped("weight"))
+            )
+        wizard.max_weight = max(weight for weight, __ in loads.values()) or 1.0
+        action = wizard.button_plan_shipments()
+        shipments = self.env[action.get("res_model")].search(action.get("domain"))
+        self.assertEqual(shipments.planned_move_ids, pickings.move_ids)
@@ -0,0 +1,72 @@
+# Copyright 2023 ACSONE SA/NV
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from datetime import datetime, timedelta
+
+from .common import TestShipmentAdvicePlannerCommon
+
+
+class TestShipmentAdvicePlannerDockSlots(TestShipmentAdvicePlannerCommon):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        dock_model = cls.env["stock.dock"]
+        dock_model.search([("warehouse_id", "=", cls.warehouse.id)]).active = False
+        cls.dock1 = dock_model.create(
+            {"name": "Dock 1", "warehouse_id": cls.warehouse.id}
+        )
+        cls.dock2 = dock_model.create(
+            {"name": "Dock 2", "warehouse_id": cls.warehouse.id}
+        )
+        cls.date_from = datetime(2100, 1, 1, 8, 0)
+
+    def test_find_dock_slot(self):
+        planner = self.env["shipment.advice.planner"]
+        hour = timedelta(hours=1)
+        start = self.date_from
+        busy = [(start - hour, start), (start + hour, start + 2 * hour)]
+        self.assertEqual(planner._find_dock_slot(busy, start, hour), start)
+        self.assertEqual(
+            planner._find_dock_slot(busy, start, 2 * hour), start + 2 * hour
+        )
+        self.assertEqual(planner._find_dock_slot([], start, hour), start)
+
+    def test_schedule_dock_slots(self):
+        hour = timedelta(hours=1)
+        self.env["shipment.advice"].create(
+            {
+                "shipment_type": "outgoing",
+                "warehouse_id": self.warehouse.id,
+                "dock_id": self.dock1.id,
+                "arrival_date": self.date_from,
+                "departure_date": self.date_from + hour,
+            }
+        )
+        self.wizard_form.schedule_dock_slots = True
+        self.wizard_form.planning_date = self.date_from
+        self.wizard_form.dock_slot_duration = 1.0
+        wizard = self.wizard_form.save()
+        vals_list = [{"warehouse_id": self.warehouse.id} for __ in range(3)]
+        wizard._schedule_dock_slots(vals_list)
+        self.assertEqual(
+            [(vals["dock_id"], vals["arrival_date"]) for vals in vals_list],
+            [
+                (self.dock2.id, self.date_from),
+                (self.dock1.id, self.date_from + hour),
+                (self.dock2.id, self.date_from + hour),
+            ],
+        )
+        for vals in vals_list:
+            self.assertEqual(vals["departure_date"], vals["arrival_date"] + hour)
+
+    def test_shipment_advice_planner_dock_slots(self):
+        self.wizard_form.warehouse_id = self.warehouse
+        self.wizard_form.schedule_dock_slots = True
+        self.wizard_form.planning_date = self.date_from
+        wizard = self.wizard_form.save()
+        action = wizard.button_plan_shipments()
+        shipments = self.env[action.get("res_model")].search(action.get("domain"))
+        self.assertTrue(shipments)
+        slots = {(s.dock_id, s.arrival_date) for s in shipments}
+        self.assertEqual(len(slots), len(shipments))
+        self.assertEqual(shipments.dock_id, (self.dock1 | self.dock2)[: len(shipments)])
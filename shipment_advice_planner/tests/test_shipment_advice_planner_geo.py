@@ -0,0 +1,63 @@
+# Copyright 2023 ACSONE SA/NV
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import numpy as np
+
+from .common import TestShipmentAdvicePlannerCommon
+
+
+class TestShipmentAdvicePlannerGeo(TestShipmentAdvicePlannerCommon):
+    def test_build_savings_routes(self):
+        planner = self.env["shipment.advice.planner"]
+        # Two stops north and two stops south of the depot
+        coords = np.radians([[1.0, 0.0], [-1.0, 0.0], [1.1, 0.1], [-1.1, -0.1]])
+        depot = np.radians([0.0, 0.0])
+        sizes = np.ones((4, 3))
+        capacities = np.array([np.inf, np.inf, 2])
+        routes = planner._build_savings_routes(coords, depot, sizes, capacities)
+        self.assertEqual(sorted(sorted(route) for route in routes), [[0, 2], [1, 3]])
+        # One stop per tour
+        capacities[2] = 1
+        routes = planner._build_savings_routes(coords, depot, sizes, capacities)
+        self.assertEqual(len(routes), 4)
+        # No limit: a single tour
+        capacities[2] = np.inf
+        routes = planner._build_savings_routes(coords, depot, sizes, capacities)
+        self.assertEqual(len(routes), 1)
+
+    def test_build_savings_routes_many_stops(self):
+        planner = self.env["shipment.advice.planner"]
+        rng = np.random.default_rng(42)
+        stop_count = 5000
+        coords = np.radians(rng.uniform([50.0, 4.0], [51.0, 5.0], (stop_count, 2)))
+        depot = np.radians([50.5, 4.5])
+        sizes = np.column_stack(
+            [rng.uniform(1, 100, stop_count), np.zeros(stop_count), np.ones(stop_count)]
+        )
+        capacities = np.array([1000.0, np.inf, 20])
+        routes = planner._build_savings_routes(coords, depot, sizes, capacities)
+        self.assertEqual(
+            sorted(stop for route in routes for stop in route), list(range(stop_count))
+        )
+        for route in routes:
+            self.assertTrue(np.all(sizes[route].sum(axis=0) <= capacities))
+
+    def test_shipment_advice_planner_geo(self):
+        self.wizard_form.shipment_planning_method = "geo"
+        # The limits are available for the geographic method
+        self.wizard_form.max_weight = 0
+        self.wizard_form.max_volume = 0
+        self.wizard_form.max_stops = 2
+        wizard = self.wizard_form.save()
+        pickings = wizard.picking_to_plan_ids
+        partners = pickings.partner_id
+        # Locate all the delivery addresses but one
+        for index, partner in enumerate(partners[1:]):
+            partner.write(
+                {"partner_latitude": 50.0 + index / 10, "partner_longitude": 4.0}
+            )
+        action = wizard.button_plan_shipments()
+        shipments = self.env[action.get("res_model")].search(action.get("domain"))
+        self.assertEqual(shipments.planned_move_ids, pickings.move_ids)
+        for shipment in shipments:
+            self.assertLessEqual(len(shipment.planned_picking_ids.partner_id), 2)
@@ -1,8 +1,23 @@
 # Copyright 2023 ACSONE SA/NV
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import json
+from bisect import insort
+from collections import defaultdict
+from datetime import timedelta
+from operator import itemgetter
+
+import numpy as np
+
 from odoo import Command, _, api, fields, models
 from odoo.exceptions import ValidationError
+from odoo.tools import format_datetime
+
+EARTH_RADIUS_KM = 6371.0
+# Above this number of stops, the savings are only computed between stops
+# close in bearing from the depot instead of between all the pairs of stops
+GEO_FULL_MATRIX_MAX_STOPS = 1000
+GEO_ANGULAR_NEIGHBORS = 30
 
 
 class ShipmentAdvicePlanner(models.TransientModel):
@@ -20,12 +35,59 @@ class ShipmentAdvicePlanner(models.TransientModel):
         readonly=False,
     )
     shipment_planning_method = fields.Selection(
-        selection=[("simple", "Simple")], required=True, default="simple"
+        selection=[
+            ("simple", "Simple"),
+            ("capacity", "Capacity"),
+            ("geo", "Geographic"),
+        ],
+        required=True,
+        default="simple",
+    )
+    max_weight = fields.Float(
+        string="Max weight per shipment",
+        digits="Stock Weight",
+        help="Maximum weight loaded in a shipment (0 for no limit). Used by "
+        "the capacity and geographic planning methods.",
+    )
+    max_volume = fields.Float(
+        string="Max volume per shipment",
+        digits="Volume",
+        help="Maximum volume loaded in a shipment (0 for no limit). Used by "
+        "the capacity and geographic planning methods.",
+    )
+    max_stops = fields.Integer(
+        string="Max stops per shipment",
+        help="Maximum number of delivery addresses served by a shipment "
+        "(0 for no limit). Used by the capacity and geographic planning "
+        "methods.",
     )
     warehouse_id = fields.Many2one(comodel_name="stock.warehouse")
     dock_id = fields.Many2one(
         comodel_name="stock.dock", domain='[("warehouse_id", "=", warehouse_id)]'
     )
+    schedule_dock_slots = fields.Boolean(
+        help="Assign a dock and an arrival/departure slot to each planned "
+        "shipment, according to the shipments already scheduled at the docks "
+        "of the warehouse (or at the selected dock).",
+    )
+    dock_slot_duration = fields.Float(
+        string="Dock slot duration",
+        default=1.0,
+        help="Time (in hours) a truck spends at the dock.",
+    )
+    planning_date = fields.Datetime(
+        string="Plan from",
+        default=fields.Datetime.now,
+        help="Earliest arrival date of the planned shipments.",
+    )
+    preview_data = fields.Text(
+        compute="_compute_preview_data",
+        store=True,
+        readonly=False,
+        help="Shipments planned in preview, as a JSON list of "
+        '{"vals": shipment values, "move_ids": moves to plan}.',
+    )
+    preview_summary = fields.Text(compute="_compute_preview_summary")
 
     @api.constrains("warehouse_id", "dock_id", "picking_to_plan_ids")
     def _check_warehouse(self):
@@ -88,9 +150,61 @@ class ShipmentAdvicePlanner(models.TransientModel):
 
         return self.update({"picking_to_plan_ids": [Command.set(pickings_to_plan.ids)]})
 
+    @api.model
+    def _get_compute_preview_data_depends(self):
+        return [
+            "picking_to_plan_ids",
+            "shipment_planning_method",
+            "warehouse_id",
+            "dock_id",
+            "max_weight",
+            "max_volume",
+            "max_stops",
+            "schedule_dock_slots",
+            "dock_slot_duration",
+            "planning_date",
+        ]
+
+    @api.depends(lambda m: m._get_compute_preview_data_depends())
+    def _compute_preview_data(self):
+        """Any change of the planning inputs discards the preview."""
+        self.preview_data = False
+
+    @api.depends("preview_data")
+    def _compute_preview_summary(self):
+        for rec in self:
+            summary = False
+            if rec.preview_data:
+                summary = rec._format_shipment_plan_summary(
+                    rec._get_shipment_plan_summary(json.loads(rec.preview_data))
+                )
+            rec.preview_summary = summary
+
+    def button_preview_shipments(self):
+        """Plan the shipments in memory and show the plan in the wizard."""
+        self.ensure_one()
+        plan = self._prepare_shipment_plan()
+        self.preview_data = json.dumps(plan, default=fields.Datetime.to_string)
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Shipment Advice Planner"),
+            "view_mode": "form",
+            "res_model": self._name,
+            "res_id": self.id,
+            "target": "new",
+            "context": self.env.context,
+        }
+
     def button_plan_shipments(self):
         self.ensure_one()
-        shipment_advices = self._plan_shipments_for_method()
+        if self.preview_data:
+            # The transfers may have been planned since the preview
+            self._check_picking_to_plan()
+            shipment_advices = self._create_shipments_from_plan(
+                json.loads(self.preview_data)
+            )
+        else:
+            shipment_advices = self._plan_shipments_for_method()
         if not shipment_advices:
             return {}
         return {
@@ -103,6 +217,14 @@ class ShipmentAdvicePlanner(models.TransientModel):
         }
 
     def _plan_shipments_for_method(self):
+        self.ensure_one()
+        return self._create_shipments_from_plan(self._prepare_shipment_plan())
+
+    def _prepare_shipment_plan(self):
+        """Plan the shipments without writing anything.
+
+        Return a list of {"vals": shipment values, "move_ids": moves to plan}.
+        """
         self.ensure_one()
         prepare_method_name = self._get_prepare_method_name()
         if not hasattr(self, prepare_method_name):
@@ -111,32 +233,192 @@ class ShipmentAdvicePlanner(models.TransientModel):
                 % self.shipment_planning_method
             )
         prepare_method = getattr(self, prepare_method_name)
-        shipment_advice_model = self.env["shipment.advice"]
         create_vals = []
-        for (
-            picking_type,
-            pickings_to_plan,
-        ) in self._get_picking_to_plan_by_picking_type().items():
+        for picking_type, pickings_to_plan in self._get_picking_to_plan_partitions():
             create_vals.extend(prepare_method(picking_type, pickings_to_plan))
-        return shipment_advice_model.create(create_vals)
+        if self.schedule_dock_slots:
+            self._schedule_dock_slots(create_vals)
+        return [
+            {"vals": vals, "move_ids": self._pop_planned_move_ids(vals)}
+            for vals in create_vals
+        ]
+
+    @api.model
+    def _pop_planned_move_ids(self, vals):
+        """Remove the planned moves from the shipment values and return them."""
+        move_ids = []
+        for command in vals.pop("planned_move_ids", []):
+            if command[0] == Command.SET:
+                move_ids = list(command[2])
+            elif command[0] == Command.LINK:
+                move_ids.append(command[1])
+            elif command[0] == Command.UNLINK:
+                move_ids = [move_id for move_id in move_ids if move_id != command[1]]
+            elif command[0] == Command.CLEAR:
+                move_ids = []
+            else:
+                raise NotImplementedError(
+                    _("Unsupported command %s on the moves to plan", command[0])
+                )
+        return move_ids
+
+    def _create_shipments_from_plan(self, plan):
+        """Create the planned shipments and assign them their moves.
+
+        The shipments are created at once, then the moves of each shipment
+        are planned with one write.
+        """
+        self.ensure_one()
+        shipments = self.env["shipment.advice"].create(
+            [shipment_plan["vals"] for shipment_plan in plan]
+        )
+        for shipment, shipment_plan in zip(shipments, plan):
+            if shipment_plan["move_ids"]:
+                self._assign_moves_to_shipment(shipment, shipment_plan["move_ids"])
+        return shipments
+
+    def _assign_moves_to_shipment(self, shipment, move_ids):
+        """Plan the moves in the shipment."""
+        self.env["stock.move"].browse(move_ids).write(
+            {"shipment_advice_id": shipment.id}
+        )
+
+    def _get_shipment_plan_summary(self, plan):
+        """Return the counts, weights and docks of the planned shipments."""
+        moves = self.env["stock.move"].browse(
+            [move_id for shipment_plan in plan for move_id in shipment_plan["move_ids"]]
+        )
+        loads = self._get_picking_loads(moves.picking_id)
+        docks = self.env["stock.dock"].browse(
+            {shipment_plan["vals"].get("dock_id") for shipment_plan in plan} - {False}
+        )
+        dock_names = {dock.id: dock.display_name for dock in docks}
+        shipments = []
+        for shipment_plan in plan:
+            pickings = moves.browse(shipment_plan["move_ids"]).picking_id
+            vals = shipment_plan["vals"]
+            shipments.append(
+                {
+                    "picking_count": len(pickings),
+                    "move_count": len(shipment_plan["move_ids"]),
+                    "weight": sum(loads[picking.id][0] for picking in pickings),
+                    "volume": sum(loads[picking.id][1] for picking in pickings),
+                    "dock": dock_names.get(vals.get("dock_id"), False),
+                    "arrival_date": vals.get("arrival_date"),
+                }
+            )
+        return {
+            "shipment_count": len(plan),
+            "picking_count": len(moves.picking_id),
+            "move_count": len(moves),
+            "weight": sum(shipment["weight"] for shipment in shipments),
+            "volume": sum(shipment["volume"] for shipment in shipments),
+            "shipments": shipments,
+        }
+
+    def _format_shipment_plan_summary(self, summary):
+        product_tmpl_model = self.env["product.template"]
+        weight_uom = product_tmpl_model._get_weight_uom_name_from_ir_config_parameter()
+        volume_uom = product_tmpl_model._get_volume_uom_name_from_ir_config_parameter()
+        lines = [
+            _(
+                "%(shipment_count)s shipments, %(picking_count)s transfers, "
+                "%(move_count)s moves, %(weight).2f %(weight_uom)s, "
+                "%(volume).2f %(volume_uom)s",
+                weight_uom=weight_uom,
+                volume_uom=volume_uom,
+                **{key: value for key, value in summary.items() if key != "shipments"},
+            )
+        ]
+        for index, shipment in enumerate(summary["shipments"], start=1):
+            line = _(
+                "#%(index)s: %(picking_count)s transfers, %(move_count)s moves, "
+                "%(weight).2f %(weight_uom)s, %(volume).2f %(volume_uom)s",
+                index=index,
+                weight_uom=weight_uom,
+                volume_uom=volume_uom,
+                **shipment,
+            )
+            if shipment["dock"]:
+                line += _(
+                    ", dock %(dock)s at %(date)s",
+                    dock=shipment["dock"],
+                    date=format_datetime(self.env, shipment["arrival_date"]),
+                )
+            lines.append(line)
+        return "\n".join(lines)
 
     def _get_prepare_method_name(self):
         self.ensure_one()
         return f"_prepare_shipment_advice_{self.shipment_planning_method}_vals_list"
 
+    def _get_picking_to_plan_grouping_keys(self):
+        """Return the keys partitioning the pickings to plan of a picking type.
+
+        A key is either a field name of the pickings or a callable taking a
+        picking. Planning methods can declare keys (carrier, partner zone,
+        scheduled date...) by implementing
+        `_get_picking_to_plan_<method>_grouping_keys`.
+        """
+        self.ensure_one()
+        method_keys = getattr(
+            self,
+            f"_get_picking_to_plan_{self.shipment_planning_method}_grouping_keys",
+            None,
+        )
+        return list(method_keys()) if method_keys else []
+
+    def _partition_pickings_to_plan(self, keys=None, pickings=None):
+        """Partition the pickings (to plan by default) in a single pass.
+
+        Return a dict {(picking type, *other key values): pickings}, or
+        {(key values): pickings} if `keys` is given.
+        """
+        self.ensure_one()
+        if keys is None:
+            keys = ["picking_type_id"] + self._get_picking_to_plan_grouping_keys()
+        if pickings is None:
+            pickings = self.picking_to_plan_ids
+        getters = [key if callable(key) else itemgetter(key) for key in keys]
+        partitions = defaultdict(list)
+        for picking in pickings:
+            partitions[tuple(getter(picking) for getter in getters)].append(
+                picking.id
+            )
+        return {key: pickings.browse(ids) for key, ids in partitions.items()}
+
     def _get_picking_to_plan_by_picking_type(self):
         self.ensure_one()
-        picking_type_model = self.env["stock.picking.type"]
-        picking_model = self.env["stock.picking"]
-        res = {}
-        for group in picking_model.read_group(
-            [("id", "in", self.picking_to_plan_ids.ids)],
-            ["picking_type_id"],
-            ["picking_type_id"],
-        ):
-            picking_type = picking_type_model.browse(group.get("picking_type_id")[0])
-            res[picking_type] = picking_model.search(group.get("__domain"))
-        return res
+        return {
+            key[0]: pickings
+            for key, pickings in self._partition_pickings_to_plan(
+                ["picking_type_id"]
+            ).items()
+        }
+
+    def _get_picking_to_plan_partitions(self):
+        """Return the list of (picking type, pickings) to plan together.
+
+        The pickings are grouped by `_get_picking_to_plan_by_picking_type`,
+        then partitioned by the grouping keys of the planning method.
+        """
+        self.ensure_one()
+        keys = self._get_picking_to_plan_grouping_keys()
+        partitions = []
+        for (
+            picking_type,
+            pickings_to_plan,
+        ) in self._get_picking_to_plan_by_picking_type().items():
+            if not keys:
+                partitions.append((picking_type, pickings_to_plan))
+                continue
+            partitions.extend(
+                (picking_type, pickings)
+                for pickings in self._partition_pickings_to_plan(
+                    keys, pickings_to_plan
+                ).values()
+            )
+        return partitions
 
     def _prepare_shipment_advice_simple_vals_list(self, picking_type, pickings_to_plan):
         self.ensure_one()
@@ -144,6 +426,373 @@ class ShipmentAdvicePlanner(models.TransientModel):
         vals["planned_move_ids"] = [Command.set(pickings_to_plan.move_ids.ids)]
         return [vals]
 
+    def _prepare_shipment_advice_capacity_vals_list(
+        self, picking_type, pickings_to_plan
+    ):
+        """Pack the pickings in as many shipments as needed for the capacities.
+
+        The pickings of a delivery address are kept together as a stop, the
+        stops are packed with a first-fit-decreasing heuristic.
+        """
+        self.ensure_one()
+        stops = self._get_capacity_stops(pickings_to_plan)
+        sizes = self._get_stop_sizes(stops)
+        bins = self._pack_first_fit_decreasing(sizes, self._get_capacities())
+        return [
+            self._prepare_shipment_advice_stops_vals(
+                picking_type, [stops[i] for i in np.flatnonzero(bins == bin_index)]
+            )
+            for bin_index in range(bins.max() + 1 if len(bins) else 0)
+        ]
+
+    def _prepare_shipment_advice_stops_vals(self, picking_type, stops):
+        vals = self._prepare_shipment_advice_common_vals(picking_type)
+        pickings = self.env["stock.picking"].union(*stops)
+        vals["planned_move_ids"] = [Command.set(pickings.move_ids.ids)]
+        return vals
+
+    def _get_capacities(self):
+        """Return the capacities (weight, volume, stops) of a shipment."""
+        capacities = np.array(
+            [self.max_weight, self.max_volume, self.max_stops], dtype=float
+        )
+        capacities[capacities <= 0] = np.inf
+        return capacities
+
+    def _get_stop_sizes(self, stops):
+        """Return the array of the (weight, volume, 1) of each stop."""
+        loads = self._get_picking_loads(self.env["stock.picking"].union(*stops))
+        return np.array(
+            [
+                [
+                    sum(loads[picking.id][0] for picking in stop),
+                    sum(loads[picking.id][1] for picking in stop),
+                    1.0,
+                ]
+                for stop in stops
+            ]
+        ).reshape(-1, 3)
+
+    def _get_capacity_stops(self, pickings):
+        """Return the pickings grouped by delivery address."""
+        stops = defaultdict(list)
+        for picking in pickings:
+            stops[picking.partner_id.id].append(picking.id)
+        return [pickings.browse(ids) for ids in stops.values()]
+
+    def _get_picking_loads(self, pickings):
+        """Return the weight and volume to ship per picking.
+
+        Return a dict {picking_id: (weight, volume)}.
+        """
+        loads = dict.fromkeys(pickings.ids, (0.0, 0.0))
+        if not pickings:
+            return loads
+        self.env["stock.move"].flush_model(
+            ["picking_id", "product_id", "product_qty", "weight", "state"]
+        )
+        self.env["product.product"].flush_model(["volume"])
+        self.env.cr.execute(
+            """
+            SELECT
+                move.picking_id,
+                SUM(COALESCE(move.weight, 0)),
+                SUM(move.product_qty * COALESCE(product.volume, 0))
+            FROM stock_move move
+            JOIN product_product product ON product.id = move.product_id
+            WHERE move.picking_id IN %s
+                AND move.state NOT IN ('draft', 'cancel', 'done')
+            GROUP BY move.picking_id
+            """,
+            (tuple(pickings.ids),),
+        )
+        loads.update(
+            (picking_id, (weight, volume))
+            for picking_id, weight, volume in self.env.cr.fetchall()
+        )
+        return loads
+
+    @api.model
+    def _pack_first_fit_decreasing(self, sizes, capacities):
+        """Pack items in bins with the first-fit-decreasing heuristic.
+
+        :param sizes: array (items x dimensions) of the item sizes
+        :param capacities: array (dimensions) of the bin capacities, `inf`
+                           for unlimited dimensions
+        :return: array of the bin index of each item, an item bigger than
+                 the capacities gets its own bin
+        """
+        item_count = len(sizes)
+        bins = np.full(item_count, -1, dtype=int)
+        if not item_count:
+            return bins
+        # Sort by decreasing size relative to the capacities
+        finite = np.isfinite(capacities)
+        relative_sizes = sizes[:, finite] / capacities[finite]
+        if relative_sizes.shape[1]:
+            order = np.argsort(-relative_sizes.max(axis=1), kind="stable")
+        else:
+            order = np.arange(item_count)
+        # Remaining capacities of the opened bins (at most one per item)
+        remaining = np.empty((item_count, len(capacities)))
+        bin_count = 0
+        for item in order:
+            size = sizes[item]
+            fitting = np.flatnonzero(np.all(remaining[:bin_count] >= size, axis=1))
+            if len(fitting):
+                bin_index = fitting[0]
+            else:
+                bin_index = bin_count
+                bin_count += 1
+                remaining[bin_index] = capacities
+            remaining[bin_index] -= size
+            bins[item] = bin_index
+        return bins
+
+    def _prepare_shipment_advice_geo_vals_list(self, picking_type, pickings_to_plan):
+        """Group the pickings in rough tours starting from the warehouse.
+
+        The stops (delivery addresses) are merged in tours with the
+        Clarke-Wright savings heuristic within the capacities of the planner.
+        The stops without coordinates are packed apart by capacity.
+        """
+        self.ensure_one()
+        stops = self._get_capacity_stops(pickings_to_plan)
+        sizes = self._get_stop_sizes(stops)
+        capacities = self._get_capacities()
+        partners = [stop.partner_id for stop in stops]
+        located = np.array(
+            [bool(p.partner_latitude or p.partner_longitude) for p in partners],
+            dtype=bool,
+        )
+        routes = []
+        located_stops = np.flatnonzero(located)
+        if len(located_stops):
+            coords = np.radians(
+                np.array(
+                    [
+                        [partners[i].partner_latitude, partners[i].partner_longitude]
+                        for i in located_stops
+                    ]
+                )
+            )
+            depot = self._get_geo_depot(picking_type, coords)
+            routes.extend(
+                located_stops[route]
+                for route in self._build_savings_routes(
+                    coords, depot, sizes[located_stops], capacities
+                )
+            )
+        unlocated_stops = np.flatnonzero(~located)
+        if len(unlocated_stops):
+            bins = self._pack_first_fit_decreasing(sizes[unlocated_stops], capacities)
+            routes.extend(
+                unlocated_stops[bins == bin_index]
+                for bin_index in range(bins.max() + 1)
+            )
+        return [
+            self._prepare_shipment_advice_stops_vals(
+                picking_type, [stops[i] for i in route]
+            )
+            for route in routes
+        ]
+
+    def _get_geo_depot(self, picking_type, coords):
+        """Return the coordinates (in radians) the tours start from.
+
+        This is the address of the warehouse, or the center of the stops if
+        it is not located.
+        """
+        partner = picking_type.warehouse_id.partner_id
+        if partner.partner_latitude or partner.partner_longitude:
+            return np.radians([partner.partner_latitude, partner.partner_longitude])
+        return coords.mean(axis=0)
+
+    @api.model
+    def _haversine(self, lat1, lon1, lat2, lon2):
+        """Return the great-circle distances (km) between points in radians."""
+        a = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+    @api.model
+    def _get_savings_candidate_pairs(self, coords, depot):
+        """Return the (i, j) arrays of the pairs of stops which could be linked.
+
+        All the pairs are considered for small sets of stops, otherwise each
+        stop is only paired with its neighbors by bearing from the depot.
+        """
+        stop_count = len(coords)
+        if stop_count <= GEO_FULL_MATRIX_MAX_STOPS:
+            return np.triu_indices(stop_count, k=1)
+        angles = np.arctan2(
+            coords[:, 0] - depot[0], (coords[:, 1] - depot[1]) * np.cos(depot[0])
+        )
+        order = np.argsort(angles, kind="stable")
+        neighbor_count = min(GEO_ANGULAR_NEIGHBORS, stop_count - 1)
+        positions = np.arange(stop_count)
+        offsets = np.arange(1, neighbor_count + 1)
+        pairs_i = order[np.repeat(positions, neighbor_count)]
+        pairs_j = order[(positions[:, None] + offsets).ravel() % stop_count]
+        return pairs_i, pairs_j
+
+    @api.model
+    def _build_savings_routes(self, coords, depot, sizes, capacities):
+        """Build tours with the Clarke-Wright savings heuristic.
+
+        Each stop starts in its own tour, then the tours are merged by linking
+        their ends in the decreasing order of the distance saved, as long as
+        the merged tour fits in the capacities.
+
+        :param coords: array (stops x 2) of the stop coordinates in radians
+        :param depot: array (2) of the depot coordinates in radians
+        :param sizes: array (stops x dimensions) of the stop sizes
+        :param capacities: array (dimensions) of the capacities of a tour
+        :return: list of the tours, as lists of stop indexes in visit order
+        """
+        stop_count = len(coords)
+        depot_distances = self._haversine(
+            depot[0], depot[1], coords[:, 0], coords[:, 1]
+        )
+        pairs_i, pairs_j = self._get_savings_candidate_pairs(coords, depot)
+        savings = (
+            depot_distances[pairs_i]
+            + depot_distances[pairs_j]
+            - self._haversine(
+                coords[pairs_i, 0],
+                coords[pairs_i, 1],
+                coords[pairs_j, 0],
+                coords[pairs_j, 1],
+            )
+        )
+        positive = savings > 0
+        pairs_i, pairs_j = pairs_i[positive], pairs_j[positive]
+        savings = savings[positive]
+        routes = {stop: [stop] for stop in range(stop_count)}
+        route_of = np.arange(stop_count)
+        loads = np.array(sizes, dtype=float)
+        for pair in np.argsort(-savings, kind="stable"):
+            i, j = pairs_i[pair], pairs_j[pair]
+            route_i, route_j = route_of[i], route_of[j]
+            if route_i == route_j:
+                continue
+            load = loads[route_i] + loads[route_j]
+            if np.any(load > capacities):
+                continue
+            stops_i, stops_j = routes[route_i], routes[route_j]
+            # Stops can only be linked if they are at an end of their tour
+            if i not in (stops_i[0], stops_i[-1]) or j not in (stops_j[0], stops_j[-1]):
+                continue
+            if stops_i[-1] != i:
+                stops_i.reverse()
+            if stops_j[0] != j:
+                stops_j.reverse()
+            stops_i.extend(stops_j)
+            route_of[stops_j] = route_i
+            loads[route_i] = load
+            del routes[route_j]
+        return list(routes.values())
+
+    def _schedule_dock_slots(self, vals_list):
+        """Assign a dock and a time slot to the shipments to create.
+
+        Each shipment gets the earliest free slot among the docks of its
+        warehouse, the docks being busy with the shipments already scheduled
+        and with the ones assigned before it.
+        """
+        self.ensure_one()
+        duration = timedelta(hours=self.dock_slot_duration or 1.0)
+        date_from = self.planning_date or fields.Datetime.now()
+        warehouse_ids = {vals["warehouse_id"] for vals in vals_list}
+        docks_by_warehouse = self._get_dock_slot_docks(warehouse_ids)
+        busy_intervals = self._get_dock_busy_intervals(
+            self.env["stock.dock"].union(*docks_by_warehouse.values()),
+            date_from,
+            duration,
+        )
+        for vals in vals_list:
+            docks = docks_by_warehouse.get(vals["warehouse_id"])
+            if not docks:
+                continue
+            # Earliest slot first, then first dock in case of equality
+            start, __, dock = min(
+                (
+                    self._find_dock_slot(busy_intervals[dock.id], date_from, duration),
+                    index,
+                    dock,
+                )
+                for index, dock in enumerate(docks)
+            )
+            insort(busy_intervals[dock.id], (start, start + duration))
+            vals.update(
+                {
+                    "dock_id": dock.id,
+                    "arrival_date": start,
+                    "departure_date": start + duration,
+                }
+            )
+        return vals_list
+
+    def _get_dock_slot_docks(self, warehouse_ids):
+        """Return the docks to schedule the shipments at, per warehouse id."""
+        if self.dock_id:
+            return {self.dock_id.warehouse_id.id: self.dock_id}
+        docks = self.env["stock.dock"].search(
+            [("warehouse_id", "in", list(warehouse_ids))], order="id"
+        )
+        docks_by_warehouse = defaultdict(lambda: self.env["stock.dock"])
+        for dock in docks:
+            docks_by_warehouse[dock.warehouse_id.id] |= dock
+        return docks_by_warehouse
+
+    def _get_dock_busy_intervals(self, docks, date_from, duration):
+        """Return the sorted (start, end) intervals the docks are busy.
+
+        The intervals come from the shipments not cancelled still at the
+        docks after `date_from`. A shipment without departure date is
+        considered to leave after `duration`.
+        """
+        busy_intervals = defaultdict(list)
+        if not docks:
+            return busy_intervals
+        shipments = self.env["shipment.advice"].search_read(
+            [
+                ("dock_id", "in", docks.ids),
+                ("state", "!=", "cancel"),
+                ("arrival_date", "!=", False),
+                "|",
+                ("departure_date", ">", date_from),
+                "&",
+                ("departure_date", "=", False),
+                ("arrival_date", ">", date_from - duration),
+            ],
+            ["dock_id", "arrival_date", "departure_date"],
+        )
+        for shipment in shipments:
+            start = shipment["arrival_date"]
+            end = max(shipment["departure_date"] or start + duration, start)
+            busy_intervals[shipment["dock_id"][0]].append((start, end))
+        for intervals in busy_intervals.values():
+            intervals.sort()
+        return busy_intervals
+
+    @api.model
+    def _find_dock_slot(self, busy_intervals, date_from, duration):
+        """Return the earliest start of a free slot in the busy intervals.
+
+        :param busy_intervals: list of (start, end) sorted by start
+        """
+        start = date_from
+        for busy_start, busy_end in busy_intervals:
+            if busy_end <= start:
+                continue
+            if busy_start >= start + duration:
+                break
+            start = busy_end
+        return start
+
     def _prepare_shipment_advice_common_vals(self, picking_type):
         self.ensure_one()
         return {